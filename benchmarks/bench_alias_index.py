@@ -0,0 +1,97 @@
+"""别名查询方式对比
+
+对比原来逐个分组检查别名和拼音的查询与 AliasIndex 的哈希索引查询，
+可以传入别名文件（正式名称到别名列表的JSON），默认生成模拟数据
+
+用法:
+    python benchmarks/bench_alias_index.py [别名文件] [查询次数]
+"""
+
+import importlib.util
+import json
+from pathlib import Path
+import random
+import sys
+import time
+import types
+
+ROOT = Path(__file__).parents[1]
+ROUNDS = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+try:
+    from zhenxun.utils.utils import cn2py
+except ImportError:
+    # 未安装zhenxun时使用与其 cn2py 相同的 pypinyin 实现
+    import pypinyin
+
+    def cn2py(word: str) -> str:
+        return "".join("".join(i) for i in pypinyin.pinyin(word, style=pypinyin.NORMAL))
+
+    utils = types.ModuleType("zhenxun.utils.utils")
+    utils.cn2py = cn2py  # type: ignore
+    sys.modules.setdefault("zhenxun", types.ModuleType("zhenxun"))
+    sys.modules.setdefault("zhenxun.utils", types.ModuleType("zhenxun.utils"))
+    sys.modules["zhenxun.utils.utils"] = utils
+
+_spec = importlib.util.spec_from_file_location(
+    "alias_index", ROOT / "wuthering_waves" / "utils" / "manager" / "alias_index.py"
+)
+alias_index = importlib.util.module_from_spec(_spec)  # type: ignore
+_spec.loader.exec_module(alias_index)  # type: ignore
+
+
+def load_groups() -> dict[str, list[str]]:
+    if len(sys.argv) > 1 and sys.argv[1] != "-":
+        return json.loads(Path(sys.argv[1]).read_text(encoding="utf8"))
+    chars = "鸣潮漂泊者今汐长离椿守岸人珂莱塔卡提希娅菲比赞妮夏空洛可可布兰特"
+    groups: dict[str, list[str]] = {}
+    while len(groups) < 120:
+        name = "".join(random.sample(chars, random.randint(2, 4)))
+        groups.setdefault(
+            name,
+            [name, *("".join(random.sample(chars, 2)) + str(i) for i in range(8))],
+        )
+    return groups
+
+
+def linear(groups: dict[str, list[str]], name: str) -> str | None:
+    """原来的查询方式"""
+    for alias, aliases in groups.items():
+        if name in aliases:
+            return alias
+        if cn2py(name) == cn2py(alias):
+            return alias
+    return None
+
+
+def bench(name: str, func, queries: list[str]) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        func(query)
+    elapsed = (time.perf_counter() - start) / len(queries) * 1_000_000
+    print(f"{name:<10}{elapsed:>10.2f} us/次")
+    return elapsed
+
+
+def main():
+    groups = load_groups()
+    start = time.perf_counter()
+    index = alias_index.AliasIndex(groups)
+    print(
+        f"分组数量: {len(groups)}，别名数量: {len(index)}，"
+        f"建立索引: {(time.perf_counter() - start) * 1000:.2f} ms"
+    )
+    names = [a for aliases in groups.values() for a in aliases]
+    queries = [
+        random.choice(names) if i % 4 else f"不存在{i}" for i in range(ROUNDS)
+    ]
+    # 结果必须与原来的查询一致
+    mismatched = [q for q in queries if linear(groups, q) != index.get(q)]
+    print(f"结果不一致: {len(mismatched)}")
+    baseline = bench("逐个分组", lambda q: linear(groups, q), queries)
+    indexed = bench("哈希索引", index.get, queries)
+    print(f"加速 {baseline / indexed:.1f} 倍")
+
+
+if __name__ == "__main__":
+    main()
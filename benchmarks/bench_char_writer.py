@@ -0,0 +1,346 @@
+"""刷新面板保存角色数据的写入方式对比
+
+在 Tortoise 的内存SQLite中对比原来逐个角色 get_or_create / create 的写入方式
+和 CharWriter.save 去重后批量写入的方式，两者都重建全部关联，
+统计每次保存一个账号所有角色的耗时和执行的语句数量
+
+用法:
+    python benchmarks/bench_char_writer.py [角色数量] [重复次数]
+"""
+
+import asyncio
+from pathlib import Path
+import random
+import sys
+import time
+
+from tortoise import Tortoise
+from tortoise.backends.sqlite.client import SqliteClient
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "tests"))
+from _plugin import load  # noqa: E402
+
+CHARS = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+ROUNDS = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+ROLE_ID = "100000001"
+
+models = load("models.waves_character")
+CharWriter = load("handles.char_writer").CharWriter
+CharDetailData = load("waves_api.api.role.models").CharDetailData
+
+
+def make_char(char_id: int) -> dict:
+    """生成一个角色的接口数据"""
+
+    def prop(name: str, value: str) -> dict:
+        return {
+            "attributeName": name,
+            "attributeValue": value,
+            "iconUrl": f"icon/{name}",
+            "valid": True,
+        }
+
+    def phantom(index: int) -> dict:
+        group_id = random.randint(1, 12)
+        return {
+            "cost": random.choice((1, 3, 4)),
+            "fetterDetail": {
+                "firstDescription": "",
+                "groupId": group_id,
+                "iconUrl": f"fetter/{group_id}",
+                "name": f"套装{group_id}",
+                "num": 5,
+                "secondDescription": "",
+            },
+            "level": 25,
+            "mainProps": [
+                prop(f"主属性{random.randint(0, 10)}", f"{random.randint(1, 40)}%")
+                for _ in range(2)
+            ],
+            "phantomProp": {
+                "cost": 4,
+                "iconUrl": "",
+                "name": f"声骸{index}",
+                "phantomId": index,
+                "phantomPropId": index,
+                "quality": 5,
+                "skillDescription": "",
+            },
+            "quality": 5,
+            "subProps": [
+                {
+                    "attributeName": f"副属性{random.randint(0, 12)}",
+                    "attributeValue": f"{random.randint(1, 20)}%",
+                    "valid": True,
+                }
+                for _ in range(5)
+            ],
+        }
+
+    skin = {
+        "isAddition": False,
+        "picUrl": "",
+        "priority": 0,
+        "quality": 5,
+        "qualityName": "",
+        "skinIcon": "",
+        "skinId": char_id,
+        "skinName": "",
+    }
+    weapon_id = random.randint(1, 60)
+    return {
+        "chainList": [
+            {
+                "description": "",
+                "iconUrl": "",
+                "name": f"{char_id}-{order}",
+                "order": order,
+                "unlocked": True,
+            }
+            for order in range(1, 7)
+        ],
+        "level": 90,
+        "phantomData": {
+            "cost": 12,
+            "equipPhantomList": [phantom(i) for i in range(5)],
+        },
+        "role": {
+            "acronym": f"r{char_id}",
+            "attributeId": 1,
+            "attributeName": "冷凝",
+            "breach": 6,
+            "chainUnlockNum": random.randint(0, 6),
+            "level": 90,
+            "roleIconUrl": "",
+            "roleId": char_id,
+            "roleName": f"角色{char_id}",
+            "rolePicUrl": "",
+            "starLevel": 5,
+            "weaponTypeId": 1,
+            "weaponTypeName": "长刃",
+        },
+        "roleSkin": skin,
+        "skillList": [
+            {
+                "level": random.randint(1, 10),
+                "skill": {
+                    "description": "",
+                    "iconUrl": "",
+                    "id": char_id * 100 + s,
+                    "name": f"技能{s}",
+                    "type": "常态攻击",
+                },
+            }
+            for s in range(8)
+        ],
+        "weaponData": {
+            "breach": 6,
+            "level": 90,
+            "resonLevel": 1,
+            "weapon": {
+                "effectDescription": "",
+                "weaponEffectName": "",
+                "weaponIcon": "",
+                "weaponId": weapon_id,
+                "weaponName": f"武器{weapon_id}",
+                "weaponStarLevel": 5,
+                "weaponType": 1,
+            },
+        },
+    }
+
+
+async def save_per_row(role_id: str, char_data):
+    """原来的写入方式（CharHandler._save_char_data），逐行写入一个角色"""
+    m = models
+    char_data_role = char_data.role
+    char_base, _ = await m.WavesCharacterBase.get_or_create(
+        char_id=char_data_role.role_id,
+        defaults={
+            "char_name": char_data_role.role_name,
+            "char_icon_url": char_data_role.role_icon_url,
+            "char_pic_url": char_data_role.role_pic_url,
+            "star_level": char_data_role.star_level,
+            "attribute_id": char_data_role.attribute_id,
+            "attribute_name": char_data_role.attribute_name,
+            "weapon_type_id": char_data_role.weapon_type_id,
+            "weapon_type_name": char_data_role.weapon_type_name,
+            "acronym": char_data_role.acronym,
+        },
+    )
+    char, created = await m.WavesCharacter.get_or_create(
+        role_id=role_id,
+        character_base=char_base,
+        defaults={
+            "level": char_data_role.level,
+            "breach": char_data_role.breach,
+            "chain_unlock_num": char_data_role.chain_unlock_num,
+        },
+    )
+    if not created:
+        char.level = char_data_role.level
+        char.breach = char_data_role.breach
+        char.chain_unlock_num = char_data_role.chain_unlock_num
+        await char.save()
+
+    await m.WavesCharSkill.filter(character_id=char.id).delete()
+    for skill_item in char_data.skill_list:
+        skill_data = skill_item.skill
+        skill, _ = await m.WavesSkill.get_or_create(
+            skill_id=skill_data.id,
+            defaults={
+                "type": skill_data.type,
+                "name": skill_data.name,
+                "description": skill_data.description,
+                "icon_url": skill_data.icon_url,
+            },
+        )
+        await m.WavesCharSkill.create(
+            character=char, skill=skill, level=skill_item.level
+        )
+
+    await m.WavesCharChain.filter(character_id=char.id).delete()
+    for chain_data in char_data.chain_list:
+        chain, _ = await m.WavesChain.get_or_create(
+            character_base=char_base,
+            name=chain_data.name,
+            order=chain_data.order,
+            defaults={
+                "description": chain_data.description,
+                "icon_url": chain_data.icon_url,
+            },
+        )
+        await m.WavesCharChain.create(character=char, chain=chain, is_unlocked=True)
+
+    weapon_data = char_data.weapon_data.weapon
+    weapon_detail, _ = await m.WavesWeaponDetail.get_or_create(
+        weapon_id=weapon_data.weapon_id,
+        defaults={
+            "weapon_name": weapon_data.weapon_name,
+            "weapon_type": weapon_data.weapon_type,
+            "weapon_star_level": weapon_data.weapon_star_level,
+            "weapon_icon": weapon_data.weapon_icon,
+            "weapon_effect_name": weapon_data.weapon_effect_name,
+        },
+    )
+    await m.WavesWeapon.filter(character_id=char.id).delete()
+    await m.WavesWeapon.create(
+        character=char,
+        weapon_detail=weapon_detail,
+        level=char_data.weapon_data.level,
+        breach=char_data.weapon_data.breach,
+        reson_level=char_data.weapon_data.reson_level,
+    )
+
+    phantoms = await m.WavesPhantom.filter(character_id=char.id)
+    await m.WavesPhantomProps.filter(
+        phantom_id__in=[p.id for p in phantoms]
+    ).delete()
+    await m.WavesPhantom.filter(character_id=char.id).delete()
+    for equip_phantom in char_data.phantom_data.equip_phantom_list:
+        if not equip_phantom:
+            continue
+        fetter_data = equip_phantom.fetter_detail
+        fetter, _ = await m.WavesFetterDetail.get_or_create(
+            group_id=fetter_data.group_id,
+            name=fetter_data.name,
+            num=fetter_data.num,
+            defaults={
+                "icon_url": fetter_data.icon_url,
+                "first_description": fetter_data.first_description,
+                "second_description": fetter_data.second_description,
+            },
+        )
+        phantom = await m.WavesPhantom.create(
+            character=char,
+            cost=equip_phantom.cost,
+            quality=equip_phantom.quality,
+            level=equip_phantom.level,
+            fetter_detail=fetter,
+        )
+        for props, is_main in (
+            (equip_phantom.main_props, True),
+            (equip_phantom.sub_props, False),
+        ):
+            for item in props:
+                if item.valid:
+                    prop, _ = await m.WavesProps.get_or_create(
+                        attribute_name=item.attribute_name,
+                        attribute_value=item.attribute_value,
+                        defaults={
+                            "icon_url": getattr(item, "icon_url", None)
+                        },
+                    )
+                    await m.WavesPhantomProps.create(
+                        phantom=phantom, props=prop, is_main=is_main
+                    )
+
+
+async def per_row(char_data_list: list):
+    for char_data in char_data_list:
+        await save_per_row(ROLE_ID, char_data)
+
+
+async def bulk(char_data_list: list):
+    await CharWriter.save(ROLE_ID, char_data_list)
+
+
+class StatementCounter:
+    """统计 SqliteClient 执行的语句数量"""
+
+    METHODS = (
+        "execute_insert",
+        "execute_many",
+        "execute_query",
+        "execute_query_dict",
+        "execute_script",
+    )
+
+    def __init__(self):
+        self.count = 0
+        for name in self.METHODS:
+            setattr(SqliteClient, name, self._wrap(getattr(SqliteClient, name)))
+
+    def _wrap(self, method):
+        async def wrapper(client, *args, **kwargs):
+            self.count += 1
+            return await method(client, *args, **kwargs)
+
+        return wrapper
+
+
+async def bench(name: str, func, chars: list, counter: StatementCounter) -> float:
+    await Tortoise.init(
+        db_url="sqlite://:memory:",
+        modules={"models": ["wuthering_waves.models.waves_character"]},
+    )
+    try:
+        await Tortoise.generate_schemas()
+        counter.count = 0
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            await func(chars)
+        elapsed = (time.perf_counter() - start) / ROUNDS * 1000
+        statements = counter.count // ROUNDS
+        characters = await models.WavesCharacter.all().count()
+        props = await models.WavesPhantomProps.all().count()
+    finally:
+        await Tortoise.close_connections()
+    print(
+        f"{name:<10}{elapsed:>10.1f} ms/次{statements:>8} 条语句/次"
+        f"  角色 {characters}  声骸属性 {props}"
+    )
+    return elapsed
+
+
+async def main():
+    chars = [CharDetailData(**make_char(1000 + i)) for i in range(CHARS)]
+    counter = StatementCounter()
+    print(f"角色数量: {CHARS}，重复次数: {ROUNDS}")
+    baseline = await bench("逐行写入", per_row, chars, counter)
+    batched = await bench("CharWriter", bulk, chars, counter)
+    print(f"加速 {baseline / batched:.1f} 倍")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
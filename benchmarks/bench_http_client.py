@@ -0,0 +1,118 @@
+"""库街区请求连接池对比
+
+在本地启动一个模拟接口的HTTP服务，对比每次请求新建客户端
+（原来 AsyncHttpx 的方式）和插件使用的 WavesHttpClient，
+服务端每个新连接额外等待一段时间，模拟TLS握手的开销，
+统计总耗时、吞吐量、连接数和单个请求延迟的 p50/p99
+
+用法:
+    python benchmarks/bench_http_client.py [请求数量] [并发数] [握手延迟毫秒]
+"""
+
+import asyncio
+from pathlib import Path
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "tests"))
+from _plugin import load  # noqa: E402
+
+WavesHttpClient = load("waves_api.client").WavesHttpClient
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+HANDSHAKE_MS = float(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+BODY = b'{"code":200,"msg":"","data":{"ok":true},"success":true}'
+
+
+class StandInServer:
+    """只实现 keep-alive 和固定响应的HTTP服务"""
+
+    def __init__(self):
+        self.connections = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        await asyncio.sleep(HANDSHAKE_MS / 1000)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(BODY)).encode() + b"\r\n\r\n" + BODY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def per_request(url: str):
+    """原来的请求方式，每次请求新建客户端"""
+    try:
+        from zhenxun.utils.http_utils import AsyncHttpx
+    except ImportError:
+        # 未安装真玄时与 AsyncHttpx.post 一样每次新建客户端
+        async with httpx.AsyncClient(verify=True) as client:
+            response = await client.post(url, data={"roleId": "1"})
+    else:
+        response = await AsyncHttpx.post(url, data={"roleId": "1"})
+    response.raise_for_status()
+
+
+async def pooled(url: str):
+    (await WavesHttpClient.post(url, data={"roleId": "1"})).raise_for_status()
+
+
+def percentile(values: list[float], percent: int) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+async def run(name: str, func, server: StandInServer) -> float:
+    server.connections = 0
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies: list[float] = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await func()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(REQUESTS)))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<16}{elapsed * 1000:>9.1f} ms{REQUESTS / elapsed:>8.1f} 请求/秒"
+        f"  p50 {percentile(latencies, 50):>6.1f} ms"
+        f"  p99 {percentile(latencies, 99):>6.1f} ms{server.connections:>5} 个连接"
+    )
+    return elapsed
+
+
+async def main():
+    server = StandInServer()
+    tcp = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+    url = f"http://127.0.0.1:{tcp.sockets[0].getsockname()[1]}/api"
+    print(f"请求数量: {REQUESTS}，并发数: {CONCURRENCY}，握手延迟: {HANDSHAKE_MS}ms")
+    baseline = await run("每次新建客户端", lambda: per_request(url), server)
+    shared = await run("WavesHttpClient", lambda: pooled(url), server)
+    await WavesHttpClient.close()
+    print(f"加速 {baseline / shared:.1f} 倍")
+    tcp.close()
+    await tcp.wait_closed()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
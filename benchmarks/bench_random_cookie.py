@@ -0,0 +1,84 @@
+"""WavesUser.random_cookie 抽样方式对比
+
+在内存SQLite中生成10万用户，对比原来的 ORDER BY RANDOM() 查询
+和缓存登录用户id列表后按主键取出的方式
+
+用法:
+    python benchmarks/bench_random_cookie.py [用户数量] [查询次数]
+"""
+
+import random
+import sqlite3
+import sys
+import time
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+ROUNDS = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+STATUSES = ["LOGIN_SUCCESS", "LOGIN_INVALID", "NOT_LOGIN"]
+
+FILTER = "cookie IS NOT NULL AND cookie_status = 'LOGIN_SUCCESS'"
+
+
+def setup() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE waves_users (id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " user_id TEXT, cookie TEXT, cookie_status TEXT, role_id TEXT UNIQUE)"
+    )
+    conn.executemany(
+        "INSERT INTO waves_users (user_id, cookie, cookie_status, role_id)"
+        " VALUES (?, ?, ?, ?)",
+        (
+            (str(i), f"cookie-{i}", random.choice(STATUSES), str(100000000 + i))
+            for i in range(USERS)
+        ),
+    )
+    conn.execute(
+        "CREATE INDEX idx_waves_users_cookie_status_cookie"
+        " ON waves_users (cookie_status, cookie)"
+    )
+    conn.commit()
+    return conn
+
+
+def order_by_random(conn: sqlite3.Connection, count: int):
+    return conn.execute(
+        f"SELECT * FROM waves_users WHERE {FILTER} ORDER BY RANDOM() LIMIT ?",
+        (count,),
+    ).fetchall()
+
+
+def cached_ids(conn: sqlite3.Connection, ids: list[int], count: int):
+    sample = random.sample(ids, min(count, len(ids)))
+    placeholders = ",".join("?" * len(sample))
+    rows = conn.execute(
+        f"SELECT * FROM waves_users WHERE id IN ({placeholders})", sample
+    ).fetchall()
+    return [row for row in rows if row[2] and row[3] == "LOGIN_SUCCESS"]
+
+
+def bench(name: str, func, *args) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        func(*args)
+    elapsed = (time.perf_counter() - start) / ROUNDS * 1000
+    print(f"{name:<20}{elapsed:>10.3f} ms/次")
+    return elapsed
+
+
+def main():
+    conn = setup()
+    print(f"用户数量: {USERS}，查询次数: {ROUNDS}")
+    start = time.perf_counter()
+    ids = [
+        row[0] for row in conn.execute(f"SELECT id FROM waves_users WHERE {FILTER}")
+    ]
+    print(f"加载id列表: {(time.perf_counter() - start) * 1000:.3f} ms（每5分钟一次）")
+    for count in (1, 5):
+        baseline = bench(f"ORDER BY RANDOM() x{count}", order_by_random, conn, count)
+        cached = bench(f"缓存id抽样 x{count}", cached_ids, conn, ids, count)
+        print(f"加速 {baseline / cached:.1f} 倍")
+
+
+if __name__ == "__main__":
+    main()
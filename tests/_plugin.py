@@ -0,0 +1,104 @@
+"""按文件路径加载插件模块
+
+不执行插件包的 `__init__`，只导入用到的子模块，避免初始化整个插件，
+未安装真玄时为插件用到的少量真玄接口提供最小实现，
+测试和基准测试共用
+"""
+
+import importlib
+from pathlib import Path
+import sys
+import types
+from typing import Any
+
+ROOT = Path(__file__).parents[1]
+PACKAGE = "wuthering_waves"
+
+
+class _Logger:
+    """丢弃所有日志"""
+
+    def __getattr__(self, name: str):
+        return lambda *args, **kwargs: None
+
+
+class _ZxConfig:
+    _configs: dict[tuple[str, str], Any] = {}
+
+    @classmethod
+    def add_plugin_config(cls, module: str, key: str, value: Any, **kwargs):
+        cls._configs[(module, key)] = value
+
+    @classmethod
+    def get_config(cls, module: str, key: str) -> Any:
+        return cls._configs[(module, key)]
+
+
+class _BotConfig:
+    system_proxy: str | None = None
+
+
+class _PlatformUtils:
+    @classmethod
+    async def send_superuser(cls, *args, **kwargs):
+        pass
+
+
+def _stand_in(name: str, package: bool = False, **attrs: Any):
+    module = types.ModuleType(name)
+    if package:
+        module.__path__ = []  # type: ignore
+    module.__dict__.update(attrs)
+    sys.modules.setdefault(name, module)
+
+
+def _install_zhenxun():
+    try:
+        import zhenxun  # noqa: F401
+
+        return
+    except ImportError:
+        pass
+    from tortoise.models import Model
+
+    for name in ("zhenxun", "zhenxun.services", "zhenxun.configs", "zhenxun.utils"):
+        _stand_in(name, package=True)
+    _stand_in("zhenxun.services.log", logger=_Logger())
+    _stand_in("zhenxun.services.db_context", Model=Model)
+    _stand_in("zhenxun.configs.config", Config=_ZxConfig, BotConfig=_BotConfig)
+    _stand_in("zhenxun.utils.platform", PlatformUtils=_PlatformUtils)
+    _stand_in(
+        "zhenxun.utils.user_agent",
+        get_user_agent=lambda: {"User-Agent": "Mozilla/5.0"},
+    )
+
+
+def _install_packages():
+    """注册插件内所有包但不执行其 `__init__`"""
+    for init in (ROOT / PACKAGE).rglob("__init__.py"):
+        name = ".".join(init.parent.relative_to(ROOT).parts)
+        if name in sys.modules:
+            continue
+        package = types.ModuleType(name)
+        package.__path__ = [str(init.parent)]  # type: ignore
+        sys.modules[name] = package
+
+
+def load(name: str) -> types.ModuleType:
+    """加载插件子模块，子模块导入的其他包同样不会执行 `__init__`
+
+    参数:
+        name: 相对插件包的模块名，如 `utils.cache_backend`
+
+    返回:
+        types.ModuleType: 模块
+    """
+    import nonebot
+
+    try:
+        nonebot.get_driver()
+    except ValueError:
+        nonebot.init(driver="~none")
+    _install_zhenxun()
+    _install_packages()
+    return importlib.import_module(f"{PACKAGE}.{name}")
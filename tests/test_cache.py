@@ -0,0 +1,53 @@
+from _plugin import load
+
+cache = load("utils.cache")
+NamespacedCache = cache.NamespacedCache
+TimedCache = cache.TimedCache
+
+
+def make_root(budget: int) -> tuple:
+    root = NamespacedCache(budget_bytes=budget)
+    response = TimedCache(
+        maxsize=1000, name="test_response", track_bytes=True, priority=0
+    )
+    ann = TimedCache(maxsize=1000, name="test_ann", track_bytes=True)
+    token = TimedCache(
+        maxsize=1000, name="test_token", track_bytes=True, priority=None
+    )
+    for timed in (response, ann, token):
+        root.register(timed)
+    return root, response, ann, token
+
+
+def test_budget_evicts_response_caches_first():
+    root, response, ann, token = make_root(0)
+    for i in range(20):
+        token.set(i, "t" * 100)
+        ann.set(i, "a" * 100)
+    # 响应缓存占用比公告缓存少，仍然先被淘汰
+    for i in range(10):
+        response.set(i, "r" * 50)
+    root.budget_bytes = int(token.cost + ann.cost + response.cost / 2)
+    root.enforce_budget()
+
+    assert len(token) == 20
+    assert len(ann) == 20
+    assert 0 < len(response) < 10
+    # 淘汰最久未使用的项
+    assert response.keys() == list(range(10 - len(response), 10))
+
+
+def test_budget_skips_non_evictable_caches():
+    root, response, ann, token = make_root(0)
+    for i in range(10):
+        token.set(i, "t" * 100)
+        ann.set(i, "a" * 100)
+        response.set(i, "r" * 100)
+    root.budget_bytes = int(token.cost / 2)
+    root.enforce_budget()
+
+    assert len(token) == 10
+    assert len(ann) == 0
+    assert len(response) == 0
+    assert root.budget_evictions == 20
+
@@ -0,0 +1,192 @@
+import asyncio
+import time
+
+from pydantic import BaseModel
+import pytest
+
+from _plugin import load
+
+cache_backend = load("utils.cache_backend")
+response_cache = load("waves_api.response_cache")
+WwBaseResponse = load("base_models").WwBaseResponse
+ResponseCache = response_cache.ResponseCache
+
+
+class StubRedis:
+    """内存中的Redis客户端，实现RedisBackend用到的get/set/delete"""
+
+    def __init__(self):
+        self.data: dict[str, tuple[bytes, float | None]] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expiry = item
+        if expiry is not None and time.time() >= expiry:
+            del self.data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, px: int | None = None):
+        self.data[key] = (value, time.time() + px / 1000 if px else None)
+
+    async def delete(self, key: str):
+        self.data.pop(key, None)
+
+
+class Item(BaseModel):
+    item_id: int
+    name: str
+
+
+@pytest.fixture
+def redis_client():
+    try:
+        import fakeredis
+    except ImportError:
+        return StubRedis()
+    return fakeredis.FakeAsyncRedis()
+
+
+@pytest.fixture(params=["msgpack", "json"])
+def serializer(request, monkeypatch):
+    if request.param == "msgpack":
+        pytest.importorskip("msgpack")
+    else:
+        monkeypatch.setattr(cache_backend, "msgpack", None)
+    return request.param
+
+
+@pytest.fixture
+def shared(redis_client, monkeypatch):
+    """让 create_shared_backend 返回同一个Redis上的后端"""
+
+    def create(namespace: str, ttl: float | None = None):
+        return cache_backend.RedisBackend(namespace, ttl, 0, client=redis_client)
+
+    monkeypatch.setattr(cache_backend, "create_shared_backend", create)
+    return create
+
+
+def test_dumps_loads_roundtrip(serializer):
+    value = {"role_id": "100000001", "items": [1, 2, 3], "ok": True}
+    data = cache_backend.dumps(value)
+    assert data[:1] == (b"m" if serializer == "msgpack" else b"j")
+    assert cache_backend.loads(data) == value
+
+
+def test_loads_json_written_by_other_worker():
+    # 未安装msgpack的进程写入的数据，安装了msgpack的进程也能读取
+    assert cache_backend.loads(b'j{"a":1}') == {"a": 1}
+
+
+def test_memory_backend():
+    backend = cache_backend.MemoryBackend("test_memory", 60, 10)
+
+    async def main():
+        await backend.set("k", {"v": 1})
+        value = await backend.get("k")
+        await backend.set("short", 1, ttl=0.01)
+        await asyncio.sleep(0.05)
+        expired = await backend.get("short")
+        await backend.delete("k")
+        return value, expired, await backend.get("k")
+
+    assert asyncio.run(main()) == ({"v": 1}, None, None)
+
+
+def test_redis_backend_shared_between_workers(redis_client, serializer):
+    # 两个后端实例共用同一个Redis，相当于两个进程
+    worker_a = cache_backend.RedisBackend("test", 60, 0, client=redis_client)
+    worker_b = cache_backend.RedisBackend("test", 60, 0, client=redis_client)
+
+    async def main():
+        await worker_a.set("token", {"access_token": "abc"})
+        shared = await worker_b.get("token")
+        await worker_b.delete("token")
+        return shared, await worker_a.get("token")
+
+    shared, deleted = asyncio.run(main())
+    assert shared == {"access_token": "abc"}
+    assert deleted is None
+
+
+def test_redis_backend_ttl(redis_client):
+    backend = cache_backend.RedisBackend("test", 60, 0, client=redis_client)
+
+    async def main():
+        await backend.set("short", 1, ttl=0.05)
+        await asyncio.sleep(0.1)
+        return await backend.get("short")
+
+    assert asyncio.run(main()) is None
+
+
+def test_shared_cached_between_workers(shared, serializer):
+    calls = 0
+
+    async def fetch(cookie: str) -> dict[int, Item]:
+        nonlocal calls
+        calls += 1
+        return {1: Item(item_id=1, name="a")}
+
+    # 同一个函数装饰两次，相当于两个进程
+    worker_a = cache_backend.shared_cached("test_map", ttl=60, ignore=("cookie",))(
+        fetch
+    )
+    worker_b = cache_backend.shared_cached("test_map", ttl=60, ignore=("cookie",))(
+        fetch
+    )
+
+    async def main():
+        return await worker_a("cookie-a"), await worker_b("cookie-b")
+
+    first, second = asyncio.run(main())
+    assert calls == 1
+    assert second == first
+    assert isinstance(second[1], Item)
+
+
+def test_shared_cached_caches_none():
+    calls = 0
+
+    @cache_backend.shared_cached("test_none", ttl=60)
+    async def fetch() -> str | None:
+        nonlocal calls
+        calls += 1
+        return None
+
+    async def main():
+        return await fetch(), await fetch()
+
+    assert asyncio.run(main()) == (None, None)
+    assert calls == 1
+
+
+def test_response_cache_shared_tier(redis_client, monkeypatch):
+    monkeypatch.setattr(
+        ResponseCache,
+        "_shared",
+        cache_backend.RedisBackend("response", 60, 0, client=redis_client),
+    )
+
+    async def endpoint(role_id: str) -> WwBaseResponse[list[int]]: ...
+
+    ResponseCache.register("test.endpoint", endpoint)
+    response = WwBaseResponse[list[int]](code=200, data=[1, 2], success=True)
+    key = ResponseCache.build_key("100000001", None, {})
+
+    async def main():
+        await ResponseCache.set("test.endpoint", "100000001", key, response)
+        # 清空进程内缓存，模拟在另一个进程读取
+        ResponseCache._caches.clear()
+        shared = await ResponseCache.get("test.endpoint", "100000001", key)
+        await ResponseCache.invalidate_role("100000001")
+        ResponseCache._caches.clear()
+        return shared, await ResponseCache.get("test.endpoint", "100000001", key)
+
+    shared, invalidated = asyncio.run(main())
+    assert isinstance(shared, WwBaseResponse)
+    assert shared.data == [1, 2]
+    assert invalidated is None
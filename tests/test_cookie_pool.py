@@ -0,0 +1,49 @@
+import importlib.util
+from pathlib import Path
+
+# 直接按文件加载，避免导入插件包时初始化nonebot
+_spec = importlib.util.spec_from_file_location(
+    "cookie_pool",
+    Path(__file__).parents[1] / "wuthering_waves" / "utils" / "cookie_pool.py",
+)
+cookie_pool = importlib.util.module_from_spec(_spec)  # type: ignore
+_spec.loader.exec_module(cookie_pool)  # type: ignore
+CookiePool = cookie_pool.CookiePool
+
+
+def test_checkout_rotates():
+    pool = CookiePool()
+    pool.add("1", "cookie-1")
+    pool.add("2", "cookie-2")
+    assert [pool.checkout(), pool.checkout(), pool.checkout()] == [
+        ("1", "cookie-1"),
+        ("2", "cookie-2"),
+        ("1", "cookie-1"),
+    ]
+
+
+def test_borrowed_cookie_expired():
+    pool = CookiePool()
+    pool.add("donor", "donor-cookie")
+    pool.add("queried", "queried-cookie")
+    _, borrowed = pool.checkout()  # type: ignore
+    assert borrowed == "donor-cookie"
+
+    # 查询的角色是 queried，失效的是借用的 donor cookie
+    assert pool.quarantine_cookie(borrowed) == ["donor"]
+    assert pool.is_quarantined("donor")
+    assert not pool.is_quarantined("queried")
+    assert pool.items() == [("queried", "queried-cookie")]
+    # 之后不会再借出失效的cookie
+    assert pool.checkout() == ("queried", "queried-cookie")
+    assert pool.checkout() == ("queried", "queried-cookie")
+
+
+def test_quarantine_released_after_relogin():
+    pool = CookiePool()
+    pool.add("1", "cookie-1")
+    pool.quarantine_cookie("cookie-1")
+    assert not len(pool)
+    pool.release("1")
+    assert not pool.is_quarantined("1")
+    assert pool.release_expired(0) == 0
@@ -0,0 +1,30 @@
+from _plugin import load
+
+credential_cache = load("utils.credential_cache")
+CredentialCache = credential_cache.CredentialCache
+Credential = credential_cache.Credential
+
+
+def test_invalidate_keeps_stats_and_order():
+    cache = CredentialCache._cache
+    cache.clear()
+    CredentialCache.set("a", "1", Credential("ios", "token-a", "d", "1"))
+    CredentialCache.set("b", None, Credential("ios", "token-b", "d", "2"))
+    CredentialCache.set("c", "3", None)
+    hits, misses = cache.hits, cache.misses
+
+    # 按角色清除时也要匹配键中role_id为None、凭据中为该角色的项
+    CredentialCache.invalidate(role_id="2")
+
+    assert (cache.hits, cache.misses) == (hits, misses)
+    assert cache.keys() == [("a", "1"), ("c", "3")]
+    assert CredentialCache.get("c", "3") is False
+
+
+def test_invalidate_by_cookie():
+    CredentialCache._cache.clear()
+    CredentialCache.set("a", "1", None)
+    CredentialCache.set("a", "2", None)
+    CredentialCache.set("b", "1", None)
+    CredentialCache.invalidate(cookie="a")
+    assert CredentialCache._cache.keys() == [("b", "1")]
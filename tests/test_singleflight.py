@@ -0,0 +1,73 @@
+import asyncio
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+# 直接按文件加载，避免导入插件包时初始化nonebot
+_spec = importlib.util.spec_from_file_location(
+    "singleflight",
+    Path(__file__).parents[1] / "wuthering_waves" / "utils" / "singleflight.py",
+)
+singleflight = importlib.util.module_from_spec(_spec)  # type: ignore
+_spec.loader.exec_module(singleflight)  # type: ignore
+SingleFlight = singleflight.SingleFlight
+
+
+def test_coalesce():
+    flight = SingleFlight("test_coalesce")
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"value": 1}
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert calls == 1
+    assert results == [{"value": 1}] * 5
+    assert flight.stats()["coalesced"] == 4
+
+
+def test_leader_cancelled_waiter_gets_result():
+    flight = SingleFlight("test_leader_cancelled")
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return calls
+
+    async def main():
+        leader = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    # 等待者重新发起调用并拿到结果，而不是一起被取消
+    assert asyncio.run(main()) == 2
+
+
+def test_leader_error_propagates_to_waiter():
+    flight = SingleFlight("test_leader_error")
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(
+            flight.do("k", fetch), flight.do("k", fetch), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
@@ -1,10 +1,63 @@
+import nonebot
+from nonebot_plugin_apscheduler import scheduler
+
 from zhenxun.utils.manager.priority_manager import PriorityLifecycle
 
+from .config import config as ww_config
+from .handles.cookie import CookieHandler
 from .plugins import *  # noqa: F403
 from .router import *  # noqa: F403
+from .utils.manager.entity_manager import EntityManager
 from .utils.manager.resource_manager import WsResourceManager
+from .utils.resource.RESOURCE_PATH import init_dir
+from .utils.startup import StartupTasks
+from .waves_api.api.call import get_captcha_solver
+
+driver = nonebot.get_driver()
+
+
+async def _load_entity_data():
+    await EntityManager.reload(force=True)
+
+
+async def _init_captcha_solver():
+    get_captcha_solver()
+
+
+StartupTasks.register("entity_data", _load_entity_data)
+StartupTasks.register("captcha_solver", _init_captcha_solver)
+StartupTasks.register("cookie_pool", CookieHandler.fill_pool)
 
 
 @PriorityLifecycle.on_startup(priority=5)
 async def _():
-    await WsResourceManager.download_emoji_resources()
+    # 目录创建很快，在后台任务和指令使用资源目录之前同步完成
+    init_dir()
+    StartupTasks.start()
+    WsResourceManager.start_sync()
+
+
+@driver.on_shutdown
+async def _():
+    await WsResourceManager.stop_sync()
+
+
+if ww_config.alias_reload_interval > 0:
+    scheduler.add_job(
+        EntityManager.reload,
+        "interval",
+        seconds=ww_config.alias_reload_interval,
+        id="wuthering_waves_alias_reload",
+        max_instances=1,
+        coalesce=True,
+    )
+
+if ww_config.cookie.pool_revalidate_interval > 0:
+    scheduler.add_job(
+        CookieHandler.revalidate_pool,
+        "interval",
+        seconds=ww_config.cookie.pool_revalidate_interval,
+        id="wuthering_waves_cookie_pool",
+        max_instances=1,
+        coalesce=True,
+    )
@@ -27,4 +27,9 @@ class WwBaseResponse(BaseModel, Generic[T]):
 
     def raise_for_code(self):
         if self.code not in {10902, 200}:
-            raise APIResponseException(self.url or "", self.code, self.msg)
+            raise APIResponseException(
+                self.url or "",
+                self.code,
+                self.msg,
+                self.data if isinstance(self.data, dict | str) else None,
+            )
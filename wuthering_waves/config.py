@@ -15,8 +15,88 @@ class LoginConfig(BaseModel):
     captcha_appkey: str | None = Field(default=None, description="验证码APPKEY")
 
 
+class HttpConfig(BaseModel):
+    max_connections: int = Field(default=100, description="连接池最大连接数")
+    max_keepalive_connections: int = Field(
+        default=20, description="连接池最大保持连接数"
+    )
+    keepalive_expiry: float = Field(default=30, description="保持连接过期时间（秒）")
+    max_connections_per_host: int = Field(
+        default=10, description="单个域名最大并发连接数"
+    )
+    http2: bool = Field(default=False, description="是否启用HTTP/2")
+    timeout: float = Field(default=30, description="请求超时时间（秒）")
+    use_proxy: bool = Field(default=True, description="是否使用机器人配置的代理")
+
+
+class RefreshConfig(BaseModel):
+    initial_concurrency: int = Field(default=2, description="刷新面板初始并发数")
+    max_concurrency: int = Field(default=8, description="刷新面板最大并发数")
+    latency_threshold: float = Field(
+        default=2.0, description="刷新面板健康请求最大延迟（秒）"
+    )
+    throttle_cooldown: float = Field(
+        default=3.0, description="触发限流或验证码后的暂停时间（秒）"
+    )
+    throttle_retries: int = Field(default=2, description="触发限流后的重试次数")
+    save_batch_size: int = Field(default=10, description="刷新面板批量保存角色数量")
+
+
+class CookieConfig(BaseModel):
+    pool_size: int = Field(default=20, description="公共cookie池大小")
+    pool_revalidate_interval: int = Field(
+        default=600, description="公共cookie池重新验证间隔（秒），0为不验证"
+    )
+    validate_concurrency: int = Field(default=5, description="cookie验证并发数")
+    verdict_ttl: int = Field(default=300, description="cookie验证结果缓存时间（秒）")
+
+
+class TokenConfig(BaseModel):
+    cache_size: int = Field(default=2000, description="内存中缓存的access_token数量")
+    refresh_after: int = Field(
+        default=60 * 60 * 24, description="access_token在后台主动刷新的间隔（秒）"
+    )
+
+
+class CacheBackendConfig(BaseModel):
+    type: str = Field(
+        default="memory", description="缓存后端，memory或redis，多进程部署时使用redis"
+    )
+    redis_url: str = Field(
+        default="redis://localhost:6379/0", description="Redis连接地址"
+    )
+    prefix: str = Field(default="wuthering_waves", description="Redis键前缀")
+
+
+class EmojiConfig(BaseModel):
+    sync_interval: int = Field(
+        default=60 * 60 * 24,
+        description="表情目录同步间隔（秒），距上次同步未超过该时间时启动不再同步",
+    )
+    download_concurrency: int = Field(default=8, description="表情下载并发数")
+    download_retries: int = Field(default=3, description="单个表情下载失败重试次数")
+    download_batch_size: int = Field(
+        default=200, description="表情下载状态批量写入数据库的数量"
+    )
+
+
 class Config(BaseModel):
     login: LoginConfig = Field(default_factory=LoginConfig)
+    http: HttpConfig = Field(default_factory=HttpConfig)
+    refresh: RefreshConfig = Field(default_factory=RefreshConfig)
+    cookie: CookieConfig = Field(default_factory=CookieConfig)
+    token: TokenConfig = Field(default_factory=TokenConfig)
+    cache_backend: CacheBackendConfig = Field(default_factory=CacheBackendConfig)
+    emoji: EmojiConfig = Field(default_factory=EmojiConfig)
+    cache_budget_mb: int = Field(
+        default=64, description="统计内存的缓存总内存预算（MB），0为不限制"
+    )
+    image_cache_mb: int = Field(
+        default=32, description="已解码图标缓存内存上限（MB），0为不缓存"
+    )
+    alias_reload_interval: int = Field(
+        default=60, description="别名数据文件修改检查间隔（秒），0为不检查"
+    )
     is_test: bool = Field(default=True, description="是否为测试环境")
 
 
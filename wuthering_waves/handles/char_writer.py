@@ -0,0 +1,442 @@
+from collections.abc import Hashable
+from typing import Any, TypeVar
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.queryset import QuerySet
+from tortoise.transactions import in_transaction
+
+from zhenxun.services.db_context import Model
+
+from ..models.waves_character import (
+    WavesChain,
+    WavesCharacter,
+    WavesCharacterBase,
+    WavesCharChain,
+    WavesCharSkill,
+    WavesFetterDetail,
+    WavesPhantom,
+    WavesPhantomProps,
+    WavesProps,
+    WavesSkill,
+    WavesWeapon,
+    WavesWeaponDetail,
+)
+from ..waves_api.api.role.models import CharDetailData
+from .digest import DIGEST_PARTS, CharDigest
+
+M = TypeVar("M", bound=Model)
+
+
+class CharWriter:
+    """角色数据批量写入
+
+    先在内存中对技能、链、武器、羁绊、属性等公共表去重，
+    缺失的数据通过 bulk_create 一次写入，
+    再在同一个事务中替换摘要发生变化的关联数据，
+    语句数量与角色数量无关
+    """
+
+    @classmethod
+    async def _upsert_catalogue(
+        cls,
+        model: type[M],
+        key_fields: tuple[str, ...],
+        rows: dict[tuple, dict[str, Any]],
+        query: QuerySet[M],
+        conn: BaseDBAsyncClient,
+    ) -> dict[tuple, M]:
+        """写入缺失的公共数据，已存在的数据保持不变
+
+        参数:
+            model: 模型
+            key_fields: 唯一键字段
+            rows: 唯一键到创建默认值的映射
+            query: 查询可能已存在数据的查询集，结果可以多于rows
+            conn: 数据库连接
+
+        返回:
+            dict[tuple, M]: 唯一键到数据的映射
+        """
+
+        async def load() -> dict[tuple, M]:
+            result: dict[tuple, M] = {}
+            for obj in await query.using_db(conn):
+                result.setdefault(tuple(getattr(obj, f) for f in key_fields), obj)
+            return result
+
+        if not rows:
+            return {}
+        existing = await load()
+        missing = [
+            model(**dict(zip(key_fields, key, strict=True)), **defaults)
+            for key, defaults in rows.items()
+            if key not in existing
+        ]
+        if missing:
+            await model.bulk_create(missing, using_db=conn)
+            # 部分数据库不会回填自增id，重新查询一次
+            existing = await load()
+        return existing
+
+    @classmethod
+    async def _upsert_chars(
+        cls,
+        role_id: str,
+        char_data_list: list[CharDetailData],
+        conn: BaseDBAsyncClient,
+    ) -> dict[int, WavesCharacter]:
+        """写入角色基础信息和用户角色数据
+
+        参数:
+            role_id: 角色（用户）ID
+            char_data_list: 角色详细数据列表
+            conn: 数据库连接
+
+        返回:
+            dict[int, WavesCharacter]: 角色ID到用户角色数据的映射
+        """
+        roles = {c.role.role_id: c.role for c in char_data_list}
+        digests = {c.role.role_id: CharDigest.from_api(c) for c in char_data_list}
+        await cls._upsert_catalogue(
+            WavesCharacterBase,
+            ("char_id",),
+            {
+                (role.role_id,): {
+                    "char_name": role.role_name,
+                    "char_icon_url": role.role_icon_url,
+                    "char_pic_url": role.role_pic_url,
+                    "star_level": role.star_level,
+                    "attribute_id": role.attribute_id,
+                    "attribute_name": role.attribute_name,
+                    "weapon_type_id": role.weapon_type_id,
+                    "weapon_type_name": role.weapon_type_name,
+                    "acronym": role.acronym,
+                }
+                for role in roles.values()
+            },
+            WavesCharacterBase.filter(char_id__in=list(roles)),
+            conn,
+        )
+        query = WavesCharacter.filter(
+            role_id=role_id, character_base_id__in=list(roles)
+        ).using_db(conn)
+        chars: dict[int, WavesCharacter] = {
+            c.character_base_id: c  # type: ignore
+            for c in await query
+        }
+        missing = []
+        for char_id, role in roles.items():
+            if char := chars.get(char_id):
+                char.level = role.level
+                char.breach = role.breach
+                char.chain_unlock_num = role.chain_unlock_num
+                char.digest = digests[char_id]
+            else:
+                missing.append(
+                    WavesCharacter(
+                        role_id=role_id,
+                        character_base_id=char_id,
+                        level=role.level,
+                        breach=role.breach,
+                        chain_unlock_num=role.chain_unlock_num,
+                        digest=digests[char_id],
+                    )
+                )
+        if chars:
+            await WavesCharacter.bulk_update(
+                list(chars.values()),
+                fields=["level", "breach", "chain_unlock_num", "digest"],
+                using_db=conn,
+            )
+        if missing:
+            await WavesCharacter.bulk_create(missing, using_db=conn)
+            chars = {c.character_base_id: c for c in await query}  # type: ignore
+        return chars
+
+    @classmethod
+    async def _replace_links(
+        cls,
+        chars: dict[int, WavesCharacter],
+        char_data_list: list[CharDetailData],
+        parts: dict[int, set[str]],
+        catalogue: dict[str, dict[Hashable, Any]],
+        conn: BaseDBAsyncClient,
+    ):
+        """删除并重建角色中发生变化的技能、链、武器和声骸关联
+
+        参数:
+            chars: 角色ID到用户角色数据的映射
+            char_data_list: 角色详细数据列表
+            parts: 角色ID到需要重建部分的映射
+            catalogue: 各公共表唯一键到数据的映射
+            conn: 数据库连接
+        """
+
+        def select(part: str) -> list[CharDetailData]:
+            return [c for c in char_data_list if part in parts[c.role.role_id]]
+
+        if skill_chars := select("skills"):
+            await WavesCharSkill.filter(
+                character_id__in=[chars[c.role.role_id].id for c in skill_chars]
+            ).using_db(conn).delete()
+            char_skills: dict[tuple[int, int], WavesCharSkill] = {}
+            for char_data in skill_chars:
+                char = chars[char_data.role.role_id]
+                for skill_item in char_data.skill_list:
+                    skill = catalogue["skill"][(skill_item.skill.id,)]
+                    char_skills[(char.id, skill.id)] = WavesCharSkill(
+                        character=char, skill=skill, level=skill_item.level
+                    )
+            await WavesCharSkill.bulk_create(list(char_skills.values()), using_db=conn)
+
+        if chain_chars := select("chains"):
+            await WavesCharChain.filter(
+                character_id__in=[chars[c.role.role_id].id for c in chain_chars]
+            ).using_db(conn).delete()
+            char_chains: dict[tuple[int, int], WavesCharChain] = {}
+            for char_data in chain_chars:
+                char = chars[char_data.role.role_id]
+                for chain_data in char_data.chain_list:
+                    chain = catalogue["chain"][
+                        (char_data.role.role_id, chain_data.name, chain_data.order)
+                    ]
+                    char_chains[(char.id, chain.id)] = WavesCharChain(
+                        character=char, chain=chain, is_unlocked=True
+                    )
+            await WavesCharChain.bulk_create(list(char_chains.values()), using_db=conn)
+
+        if weapon_chars := select("weapon"):
+            await WavesWeapon.filter(
+                character_id__in=[chars[c.role.role_id].id for c in weapon_chars]
+            ).using_db(conn).delete()
+            weapons: list[WavesWeapon] = []
+            for char_data in weapon_chars:
+                weapon_data = char_data.weapon_data
+                weapons.append(
+                    WavesWeapon(
+                        character=chars[char_data.role.role_id],
+                        weapon_detail=catalogue["weapon"][
+                            (weapon_data.weapon.weapon_id,)
+                        ],
+                        level=weapon_data.level,
+                        breach=weapon_data.breach,
+                        reson_level=weapon_data.reson_level,
+                    )
+                )
+            await WavesWeapon.bulk_create(weapons, using_db=conn)
+
+        if phantom_chars := select("phantoms"):
+            await cls._replace_phantoms(chars, phantom_chars, catalogue, conn)
+
+    @classmethod
+    async def _replace_phantoms(
+        cls,
+        chars: dict[int, WavesCharacter],
+        char_data_list: list[CharDetailData],
+        catalogue: dict[str, dict[Hashable, Any]],
+        conn: BaseDBAsyncClient,
+    ):
+        """删除并重建角色的声骸及声骸属性
+
+        参数:
+            chars: 角色ID到用户角色数据的映射
+            char_data_list: 需要重建声骸的角色详细数据列表
+            catalogue: 各公共表唯一键到数据的映射
+            conn: 数据库连接
+        """
+        character_ids = [chars[c.role.role_id].id for c in char_data_list]
+        phantom_ids = await WavesPhantom.filter(
+            character_id__in=character_ids
+        ).using_db(conn).values_list("id", flat=True)
+        await WavesPhantomProps.filter(phantom_id__in=phantom_ids).using_db(
+            conn
+        ).delete()
+        await WavesPhantom.filter(character_id__in=character_ids).using_db(
+            conn
+        ).delete()
+
+        pairs: list[tuple[WavesPhantom, Any]] = []
+        """新建声骸和接口中对应的声骸数据"""
+        for char_data in char_data_list:
+            char = chars[char_data.role.role_id]
+            for equip_phantom in char_data.phantom_data.equip_phantom_list:
+                if not equip_phantom:
+                    continue
+                fetter_data = equip_phantom.fetter_detail
+                fetter_key = (fetter_data.group_id, fetter_data.name, fetter_data.num)
+                phantom = WavesPhantom(
+                    character=char,
+                    cost=equip_phantom.cost,
+                    quality=equip_phantom.quality,
+                    level=equip_phantom.level,
+                    fetter_detail=catalogue["fetter"][fetter_key],
+                )
+                pairs.append((phantom, equip_phantom))
+        if not pairs:
+            return
+        phantoms = [phantom for phantom, _ in pairs]
+        await WavesPhantom.bulk_create(phantoms, using_db=conn)
+
+        if any(phantom.pk is None for phantom in phantoms):
+            # 数据库没有回填自增id时，按写入顺序取回声骸id
+            created = (
+                await WavesPhantom.filter(character_id__in=character_ids)
+                .using_db(conn)
+                .order_by("id")
+            )
+            by_char: dict[int, list[WavesPhantom]] = {}
+            for phantom in created:
+                char_id: int = phantom.character_id  # type: ignore
+                by_char.setdefault(char_id, []).append(phantom)
+            equips_by_char: dict[int, list[Any]] = {}
+            for phantom, equip_phantom in pairs:
+                equips_by_char.setdefault(phantom.character.id, []).append(
+                    equip_phantom
+                )
+            # 数量不一致时抛出异常回滚事务，避免属性挂到错误的声骸上
+            pairs = [
+                pair
+                for char_id, equips in equips_by_char.items()
+                for pair in zip(by_char.get(char_id, []), equips, strict=True)
+            ]
+
+        phantom_props = [
+            WavesPhantomProps(
+                phantom=phantom,
+                props=catalogue["props"][(prop.attribute_name, prop.attribute_value)],
+                is_main=is_main,
+            )
+            for phantom, equip_phantom in pairs
+            for props, is_main in (
+                (equip_phantom.main_props, True),
+                (equip_phantom.sub_props, False),
+            )
+            for prop in props
+            if prop.valid
+        ]
+        await WavesPhantomProps.bulk_create(phantom_props, using_db=conn)
+
+    @classmethod
+    async def save(
+        cls,
+        role_id: str,
+        char_data_list: list[CharDetailData],
+        parts: dict[int, set[str]] | None = None,
+    ):
+        """批量保存角色数据
+
+        参数:
+            role_id: 角色（用户）ID
+            char_data_list: 角色详细数据列表
+            parts: 角色ID到摘要发生变化部分的映射，未指定的角色重建全部关联
+        """
+        if not char_data_list:
+            return
+        parts = {
+            c.role.role_id: (parts or {}).get(c.role.role_id, set(DIGEST_PARTS))
+            for c in char_data_list
+        }
+        skills: dict[tuple, dict[str, Any]] = {}
+        chains: dict[tuple, dict[str, Any]] = {}
+        weapons: dict[tuple, dict[str, Any]] = {}
+        fetters: dict[tuple, dict[str, Any]] = {}
+        props: dict[tuple, dict[str, Any]] = {}
+        for char_data in char_data_list:
+            char_parts = parts[char_data.role.role_id]
+            for skill_item in char_data.skill_list if "skills" in char_parts else []:
+                skill = skill_item.skill
+                skills.setdefault(
+                    (skill.id,),
+                    {
+                        "type": skill.type,
+                        "name": skill.name,
+                        "description": skill.description,
+                        "icon_url": skill.icon_url,
+                    },
+                )
+            for chain in char_data.chain_list if "chains" in char_parts else []:
+                chains.setdefault(
+                    (char_data.role.role_id, chain.name, chain.order),
+                    {"description": chain.description, "icon_url": chain.icon_url},
+                )
+            if "weapon" in char_parts:
+                weapon = char_data.weapon_data.weapon
+                weapons.setdefault(
+                    (weapon.weapon_id,),
+                    {
+                        "weapon_name": weapon.weapon_name,
+                        "weapon_type": weapon.weapon_type,
+                        "weapon_star_level": weapon.weapon_star_level,
+                        "weapon_icon": weapon.weapon_icon,
+                        "weapon_effect_name": weapon.weapon_effect_name,
+                    },
+                )
+            if "phantoms" not in char_parts:
+                continue
+            for equip_phantom in char_data.phantom_data.equip_phantom_list:
+                if not equip_phantom:
+                    continue
+                fetter = equip_phantom.fetter_detail
+                fetters.setdefault(
+                    (fetter.group_id, fetter.name, fetter.num),
+                    {
+                        "icon_url": fetter.icon_url,
+                        "first_description": fetter.first_description,
+                        "second_description": fetter.second_description,
+                    },
+                )
+                for prop in equip_phantom.main_props:
+                    if prop.valid:
+                        props[(prop.attribute_name, prop.attribute_value)] = {
+                            "icon_url": prop.icon_url
+                        }
+                for prop in equip_phantom.sub_props:
+                    if prop.valid:
+                        props.setdefault(
+                            (prop.attribute_name, prop.attribute_value),
+                            {"icon_url": None},
+                        )
+
+        async with in_transaction() as conn:
+            chars = await cls._upsert_chars(role_id, char_data_list, conn)
+            catalogue: dict[str, dict[Hashable, Any]] = {
+                "skill": await cls._upsert_catalogue(
+                    WavesSkill,
+                    ("skill_id",),
+                    skills,
+                    WavesSkill.filter(skill_id__in=[k[0] for k in skills]),
+                    conn,
+                ),
+                "chain": await cls._upsert_catalogue(
+                    WavesChain,
+                    ("character_base_id", "name", "order"),
+                    chains,
+                    WavesChain.filter(character_base_id__in=list(chars)),
+                    conn,
+                ),
+                "weapon": await cls._upsert_catalogue(
+                    WavesWeaponDetail,
+                    ("weapon_id",),
+                    weapons,
+                    WavesWeaponDetail.filter(weapon_id__in=[k[0] for k in weapons]),
+                    conn,
+                ),
+                "fetter": await cls._upsert_catalogue(
+                    WavesFetterDetail,
+                    ("group_id", "name", "num"),
+                    fetters,
+                    WavesFetterDetail.filter(group_id__in=[k[0] for k in fetters]),
+                    conn,
+                ),
+                "props": await cls._upsert_catalogue(
+                    WavesProps,
+                    ("attribute_name", "attribute_value"),
+                    props,
+                    WavesProps.filter(
+                        attribute_name__in=list({k[0] for k in props}),
+                        attribute_value__in=list({k[1] for k in props}),
+                    ),
+                    conn,
+                ),
+            }
+            await cls._replace_links(chars, char_data_list, parts, catalogue, conn)
@@ -1,8 +1,15 @@
+import asyncio
+import time
+from typing import ClassVar
+
 from zhenxun.services.log import logger
 
-from ..config import LOG_COMMAND
+from ..config import LOG_COMMAND, config
 from ..exceptions import APICallException, LoginStatusCheckException, WavesException
 from ..models.waves_user import WavesUser
+from ..utils.cache import TimedCache
+from ..utils.cookie_pool import cookie_pool
+from ..utils.credential_cache import CredentialCache
 from ..utils.emuns import CookieStatus
 from ..waves_api import WavesApi
 from ..waves_api.api.call import get_access_token
@@ -12,16 +19,153 @@ from ..waves_api.error_code import get_error_message
 
 
 class CookieHandler:
+    _verdicts: ClassVar[TimedCache] = TimedCache(
+        timeout=config.cookie.verdict_ttl, maxsize=5000, name="cookie_verdicts"
+    )
+    """cookie到验证结果"""
+
+    validate_stats: ClassVar[dict[str, float]] = {
+        "probes": 0,
+        "cache_hits": 0,
+        "cancelled": 0,
+        "saved_seconds": 0.0,
+    }
+    """自身cookie验证统计，saved_seconds为并发验证相比逐个验证节省的时间"""
+
+    @classmethod
+    async def _validate(cls, role_id: str, cookie: str) -> bool:
+        """验证cookie是否可用，并缓存验证结果，临时错误的结果不缓存
+
+        参数:
+            role_id: 角色id
+            cookie: cookie
+
+        返回:
+            bool: 是否可用
+        """
+        cls.validate_stats["probes"] += 1
+        result = False
+        try:
+            result = bool(await LoginApi.login_log(role_id=role_id, cookie=cookie))
+        except LoginStatusCheckException as e:
+            logger.warning(f"role_id: 【{role_id}】登录已失效...", LOG_COMMAND, e=e)
+        except WavesException as e:
+            # 网络等临时错误不能说明cookie失效，不缓存验证结果
+            logger.warning(f"role_id: 【{role_id}】登录状态检查失败", LOG_COMMAND, e=e)
+            return False
+        cls._verdicts.set(cookie, result)
+        return result
+
+    @classmethod
+    async def _first_healthy(
+        cls, candidates: list[tuple[str, str]]
+    ) -> tuple[str, str] | None:
+        """并发验证cookie，返回第一个可用的cookie并取消其余验证
+
+        近期验证过的cookie直接使用缓存的结果
+
+        参数:
+            candidates: 角色id和cookie列表
+
+        返回:
+            tuple[str, str] | None: 可用的角色id和cookie
+        """
+        pending = []
+        for role_id, cookie in candidates:
+            verdict = cls._verdicts.get(cookie)
+            if verdict is None:
+                pending.append((role_id, cookie))
+                continue
+            cls.validate_stats["cache_hits"] += 1
+            if verdict:
+                return role_id, cookie
+        if not pending:
+            return None
+
+        semaphore = asyncio.Semaphore(max(config.cookie.validate_concurrency, 1))
+        latencies: list[float] = []
+
+        async def probe(role_id: str, cookie: str) -> tuple[str, str] | None:
+            async with semaphore:
+                start = time.perf_counter()
+                ok = await cls._validate(role_id, cookie)
+                latencies.append(time.perf_counter() - start)
+                return (role_id, cookie) if ok else None
+
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(probe(*c)) for c in pending]
+        try:
+            for task in asyncio.as_completed(tasks):
+                if result := await task:
+                    return result
+            return None
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                    cls.validate_stats["cancelled"] += 1
+            elapsed = time.perf_counter() - start
+            cls.validate_stats["saved_seconds"] += max(sum(latencies) - elapsed, 0)
+
+    @classmethod
+    async def _validate_all(
+        cls, candidates: list[tuple[str, str]]
+    ) -> list[tuple[str, str]]:
+        """以有限并发验证多个cookie
+
+        参数:
+            candidates: 角色id和cookie列表
+
+        返回:
+            list[tuple[str, str]]: 验证通过的角色id和cookie列表
+        """
+        semaphore = asyncio.Semaphore(max(config.cookie.validate_concurrency, 1))
+
+        async def validate(role_id: str, cookie: str) -> bool:
+            async with semaphore:
+                return await cls._validate(role_id, cookie)
+
+        results = await asyncio.gather(*(validate(*c) for c in candidates))
+        return [c for c, ok in zip(candidates, results) if ok]
+
+    @classmethod
+    async def revalidate_pool(cls):
+        """重新验证公共cookie池，移除失效cookie并补充到配置的数量"""
+        current = cookie_pool.items()
+        healthy = set(await cls._validate_all(current))
+        for role_id, cookie in current:
+            if (role_id, cookie) not in healthy:
+                cookie_pool.quarantine(role_id)
+        await cls.fill_pool()
+        logger.debug(f"公共cookie池状态: {cookie_pool.stats()}", LOG_COMMAND)
+
+    @classmethod
+    async def fill_pool(cls):
+        """从数据库随机取出cookie验证后补充公共cookie池，跳过隔离中的角色"""
+        cookie_pool.release_expired(
+            config.cookie.pool_revalidate_interval or config.cookie.verdict_ttl
+        )
+        missing = config.cookie.pool_size - len(cookie_pool)
+        if missing <= 0:
+            return
+        # 多取一些候选，弥补其中已失效的cookie
+        candidates = [
+            (role_id, cookie)
+            for role_id, cookie in await WavesUser.random_cookie(
+                missing * 2, only_cookie=True
+            )
+            if role_id not in cookie_pool and not cookie_pool.is_quarantined(role_id)
+        ]
+        for role_id, cookie in (await cls._validate_all(candidates))[:missing]:
+            cookie_pool.add(role_id, cookie)
+
     @classmethod
     async def get_random_cookie(cls) -> str | None:
-        """随机获取一个有效的cookie"""
-        results = await WavesUser.random_cookie(1000, only_cookie=True)
-        for role_id, cookie in results:
-            try:
-                if await LoginApi.login_log(role_id=role_id, cookie=cookie):
-                    return cookie
-            except LoginStatusCheckException as e:
-                logger.warning(f"role_id: 【{role_id}】登录已失效...", LOG_COMMAND, e=e)
+        """从公共cookie池获取一个有效的cookie"""
+        if not len(cookie_pool):
+            await cls.fill_pool()
+        if result := cookie_pool.checkout():
+            return result[1]
         return None
 
     @classmethod
@@ -43,28 +187,13 @@ class CookieHandler:
             if result:
                 return result.cookie, True
         results = await WavesUser.get_user_cookies(user_id)
-        for result in results:
-            try:
-                if await LoginApi.login_log(
-                    role_id=result["role_id"], cookie=result["cookie"]
-                ):
-                    return result["cookie"], True
-            except LoginStatusCheckException as e:
-                logger.warning(
-                    f"role_id: 【{result['role_id']}】登录已失效...", LOG_COMMAND, e=e
-                )
-        # 如果自身所有cookie都失效，则随机获取有效cookie
-        results = await WavesUser.random_cookie(100)
-        for result in results:
-            try:
-                if await LoginApi.login_log(
-                    role_id=result.role_id, cookie=result.cookie
-                ):
-                    return result.cookie, False
-            except LoginStatusCheckException as e:
-                logger.warning(
-                    f"role_id: 【{result.role_id}】登录已失效...", LOG_COMMAND, e=e
-                )
+        if healthy := await cls._first_healthy(
+            [(r["role_id"], r["cookie"]) for r in results if r["cookie"]]
+        ):
+            return healthy[1], True
+        # 如果自身所有cookie都失效，则从公共cookie池借用
+        if cookie := await cls.get_random_cookie():
+            return cookie, False
         return None, False
 
     @classmethod
@@ -118,3 +247,6 @@ class CookieHandler:
                 "cookie_status",
             ]
         )
+        CredentialCache.invalidate(cookie=cookie, role_id=role.role_id)
+        cookie_pool.release(role.role_id)
+        WavesUser.clear_login_ids()
@@ -0,0 +1,154 @@
+import hashlib
+from typing import Any
+
+import ujson as json
+
+from ..models.waves_character import WavesCharacter
+from ..waves_api.api.role.models import CharDetailData
+
+DIGEST_PARTS = ("base", "skills", "chains", "weapon", "phantoms")
+"""摘要包含的数据部分"""
+
+
+class CharDigest:
+    """角色数据摘要
+
+    将接口数据和数据库数据规范化为相同结构后计算哈希，
+    通过比较摘要判断角色数据是否变化
+    """
+
+    @classmethod
+    def _hash(cls, value: Any) -> str:
+        """计算规范化数据的哈希
+
+        参数:
+            value: 规范化数据
+
+        返回:
+            str: 哈希值
+        """
+        text = json.dumps(value, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+    @classmethod
+    def _build(cls, **parts: Any) -> dict[str, str]:
+        """计算各部分摘要
+
+        返回:
+            dict[str, str]: 各部分摘要
+        """
+        return {name: cls._hash(parts[name]) for name in DIGEST_PARTS}
+
+    @classmethod
+    def from_api(cls, char_data: CharDetailData) -> dict[str, str]:
+        """计算接口角色数据的摘要
+
+        参数:
+            char_data: 角色详细数据
+
+        返回:
+            dict[str, str]: 各部分摘要
+        """
+        role = char_data.role
+        weapon_data = char_data.weapon_data
+        return cls._build(
+            base=[role.level, role.breach, role.chain_unlock_num],
+            skills=sorted([s.skill.id, s.level] for s in char_data.skill_list),
+            chains=sorted({c.name for c in char_data.chain_list if c.name}),
+            weapon=[
+                weapon_data.weapon.weapon_id,
+                weapon_data.level,
+                weapon_data.breach,
+                weapon_data.reson_level,
+            ],
+            phantoms=sorted(
+                [
+                    p.fetter_detail.group_id,
+                    p.cost,
+                    p.level,
+                    p.quality,
+                    sorted(
+                        [prop.attribute_name, prop.attribute_value]
+                        for prop in p.main_props
+                        if prop.valid
+                    ),
+                    sorted(
+                        [prop.attribute_name, prop.attribute_value]
+                        for prop in p.sub_props
+                        if prop.valid
+                    ),
+                ]
+                for p in char_data.phantom_data.equip_phantom_list
+                if p
+            ),
+        )
+
+    @classmethod
+    def from_db(cls, db_char: WavesCharacter) -> dict[str, str]:
+        """计算数据库角色数据的摘要
+
+        需要预先加载技能、链、武器、声骸及声骸属性关联，
+        见 `WavesCharacter.get_chars_snapshot`
+
+        参数:
+            db_char: 数据库角色
+
+        返回:
+            dict[str, str]: 各部分摘要
+        """
+        weapon = next(iter(db_char.weapon), None)
+        return cls._build(
+            base=[db_char.level, db_char.breach, db_char.chain_unlock_num],
+            skills=sorted([s.skill.skill_id, s.level] for s in db_char.char_skills),
+            chains=sorted({c.chain.name for c in db_char.char_chains if c.chain.name}),
+            weapon=[
+                weapon.weapon_detail.weapon_id,
+                weapon.level,
+                weapon.breach,
+                weapon.reson_level,
+            ]
+            if weapon
+            else None,
+            phantoms=sorted(
+                [
+                    p.fetter_detail.group_id,
+                    p.cost,
+                    p.level,
+                    p.quality,
+                    sorted(
+                        [pp.props.attribute_name, pp.props.attribute_value]
+                        for pp in p.phantom_props
+                        if pp.is_main
+                    ),
+                    sorted(
+                        [pp.props.attribute_name, pp.props.attribute_value]
+                        for pp in p.phantom_props
+                        if not pp.is_main
+                    ),
+                ]
+                for p in db_char.phantoms
+            ),
+        )
+
+    @classmethod
+    def diff(
+        cls, db_char: WavesCharacter | None, char_data: CharDetailData
+    ) -> set[str]:
+        """比较角色数据，返回发生变化的部分
+
+        优先使用数据库中保存的摘要，旧数据没有摘要时根据关联数据计算
+
+        参数:
+            db_char: 数据库角色，不存在时所有部分都视为变化
+            char_data: 角色详细数据
+
+        返回:
+            set[str]: 发生变化的部分
+        """
+        if not db_char:
+            return set(DIGEST_PARTS)
+        db_parts = db_char.digest or cls.from_db(db_char)
+        api_parts = cls.from_api(char_data)
+        return {
+            name for name in DIGEST_PARTS if db_parts.get(name) != api_parts[name]
+        }
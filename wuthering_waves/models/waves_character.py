@@ -43,12 +43,40 @@ class WavesCharacter(Model):
     level = fields.IntField(description="角色等级")
     breach = fields.IntField(null=True, description="突破等级")
     chain_unlock_num = fields.IntField(null=True, description="解锁链数")
+    digest = fields.JSONField(null=True, description="角色数据各部分摘要")
 
     class Meta:  # pyright: ignore [reportIncompatibleVariableOverride]
         table = "waves_characters"
         table_description = "角色用户数据表"
         unique_together = ("role_id", "character_base")
 
+    @classmethod
+    async def _run_script(cls):
+        db = cls._meta.db
+        dialect = db.capabilities.dialect
+        if dialect == "postgres":
+            return [
+                "ALTER TABLE waves_characters ADD COLUMN IF NOT EXISTS digest JSONB;"
+            ]
+        if dialect == "sqlite":
+            columns = await db.execute_query_dict(
+                "PRAGMA table_info(waves_characters);"
+            )
+            exists = any(c["name"] == "digest" for c in columns)
+        elif dialect == "mysql":
+            columns = await db.execute_query_dict(
+                "SELECT COLUMN_NAME FROM information_schema.COLUMNS"
+                " WHERE TABLE_SCHEMA = DATABASE()"
+                " AND TABLE_NAME = 'waves_characters' AND COLUMN_NAME = 'digest';"
+            )
+            exists = bool(columns)
+        else:
+            # 未知数据库直接执行，字段已存在时执行失败会被记录并忽略
+            exists = False
+        if exists:
+            return []
+        return ["ALTER TABLE waves_characters ADD COLUMN digest JSON;"]
+
     @classmethod
     async def get_chars(cls, role_id: str) -> list["WavesCharacter"]:
         """获取角色列表"""
@@ -57,6 +85,26 @@ class WavesCharacter(Model):
             await cls.filter(role_id=role_id).prefetch_related("character_base").all(),
         )
 
+    @classmethod
+    async def get_chars_snapshot(cls, role_id: str) -> list["WavesCharacter"]:
+        """获取角色列表及技能、链、武器和声骸关联
+
+        每个关联只需一次查询，查询数量与角色数量无关
+        """
+        return cast(
+            list["WavesCharacter"],
+            await cls.filter(role_id=role_id)
+            .prefetch_related(
+                "character_base",
+                "char_skills__skill",
+                "char_chains__chain",
+                "weapon__weapon_detail",
+                "phantoms__fetter_detail",
+                "phantoms__phantom_props__props",
+            )
+            .all(),
+        )
+
     @classmethod
     async def get_chars_with_weapons(cls, role_id: str) -> list["WavesCharacter"]:
         """获取角色列表及其武器信息"""
@@ -1,14 +1,19 @@
-from typing import Literal, TypeVar, cast, overload
+import random
+import time
+from typing import ClassVar, Literal, TypeVar, cast, overload
 
 from tortoise import fields
 
 from zhenxun.services.db_context import Model
-from zhenxun.utils.common_utils import SqlUtils
 
+from ..utils.credential_cache import CredentialCache
 from ..utils.emuns import CookieStatus
 
 T = TypeVar("T", bound="WavesUser")
 
+LOGIN_ID_CACHE_TTL = 300
+"""登录成功用户id列表缓存时间（秒）"""
+
 
 class WavesUser(Model):
     id = fields.IntField(pk=True, generated=True, auto_increment=True)
@@ -34,10 +39,38 @@ class WavesUser(Model):
     device_id = fields.CharField(255, null=True, description="设备id")
     """设备id"""
 
+    _login_ids: ClassVar[list[int]] = []
+    """登录成功用户id列表，用于随机抽样"""
+    _login_ids_time: ClassVar[float] = 0
+
     class Meta:  # pyright: ignore [reportIncompatibleVariableOverride]
         table = "waves_users"
         table_description = "鸣潮用户表"
 
+    @classmethod
+    async def _run_script(cls):
+        db = cls._meta.db
+        dialect = db.capabilities.dialect
+        if dialect in ("postgres", "sqlite"):
+            return [
+                "CREATE INDEX IF NOT EXISTS idx_waves_users_cookie_status_cookie"
+                " ON waves_users (cookie_status, cookie);"
+            ]
+        if dialect == "mysql":
+            # MySQL不支持 CREATE INDEX IF NOT EXISTS
+            indexes = await db.execute_query_dict(
+                "SELECT INDEX_NAME FROM information_schema.STATISTICS"
+                " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'waves_users'"
+                " AND INDEX_NAME = 'idx_waves_users_cookie_status_cookie';"
+            )
+            if indexes:
+                return []
+        # 未知数据库直接执行，索引已存在时执行失败会被记录并忽略
+        return [
+            "CREATE INDEX idx_waves_users_cookie_status_cookie"
+            " ON waves_users (cookie_status, cookie);"
+        ]
+
     @classmethod
     async def expire_cookie(
         cls,
@@ -72,6 +105,11 @@ class WavesUser(Model):
             await cls.filter(waves_id=waves_id).update(
                 cookie_status=CookieStatus.LOGIN_INVALID
             )
+        if cookie or role_id:
+            CredentialCache.invalidate(cookie=cookie, role_id=role_id)
+        else:
+            CredentialCache.invalidate()
+        cls.clear_login_ids()
 
     @classmethod
     async def get_role_ids(cls, user_id: str) -> list[str]:
@@ -114,18 +152,55 @@ class WavesUser(Model):
         返回:
             list[tuple[str, str]] | list["WavesUser"]: 随机获取的用户或cookie列表
         """
-        sql = SqlUtils.random(
-            cls.filter(
-                cookie__not_isnull=True, cookie_status=CookieStatus.LOGIN_SUCCESS
-            ),
-            count,
-        )
-        results: list["WavesUser"] = cast(list["WavesUser"], await cls.raw(sql))
+        results: list["WavesUser"] = []
+        for reload in (False, True):
+            if reload:
+                # 抽到了已失效的用户，id列表已过期，重新加载后补足数量
+                cls.clear_login_ids()
+            ids = await cls._get_login_ids()
+            if results:
+                picked = {user.id for user in results}
+                ids = [i for i in ids if i not in picked]
+            sample = random.sample(ids, min(count - len(results), len(ids)))
+            # id列表有缓存，取出后重新检查登录状态
+            # 状态条件不放进查询，避免数据库改用状态索引扫描大量数据
+            users = [
+                user
+                for user in await cls.filter(id__in=sample)
+                if user.cookie and user.cookie_status == CookieStatus.LOGIN_SUCCESS
+            ]
+            results.extend(users)
+            if len(users) == len(sample):
+                break
+        random.shuffle(results)
         if only_cookie:
             return [(s.role_id, s.cookie) for s in results]
         else:
             return results
 
+    @classmethod
+    def clear_login_ids(cls):
+        """清除登录成功用户id列表缓存，登录状态变化后调用"""
+        cls._login_ids = []
+        cls._login_ids_time = 0
+
+    @classmethod
+    async def _get_login_ids(cls) -> list[int]:
+        """获取登录成功用户的id列表，定期从数据库重新加载
+
+        返回:
+            list[int]: 用户id列表
+        """
+        if not cls._login_ids or time.time() - cls._login_ids_time > LOGIN_ID_CACHE_TTL:
+            cls._login_ids = cast(
+                list[int],
+                await cls.filter(
+                    cookie__not_isnull=True, cookie_status=CookieStatus.LOGIN_SUCCESS
+                ).values_list("id", flat=True),
+            )
+            cls._login_ids_time = time.time()
+        return cls._login_ids
+
     @classmethod
     async def get_user_cookie(cls, role_id: str) -> "WavesUser | None":
         """获取指定角色id的cookie"""
@@ -1,5 +1,10 @@
 from pathlib import Path
+import time
 
 import nonebot
 
+from ..utils.startup import StartupTasks
+
+_start = time.perf_counter()
 nonebot.load_plugins(str(Path(__file__).parent.resolve()))
+StartupTasks.record("import_plugins", time.perf_counter() - _start)
@@ -1,10 +1,10 @@
 from typing import cast
 
 from ...exceptions import WavesException
-from ...utils.utils import TimedCache
+from ...utils.cache import TimedCache
 from ...waves_api.api.ann import AnnApi
 
-cache = TimedCache(60 * 60 * 12)
+cache = TimedCache(60 * 60 * 12, name="ann_post_id")
 
 
 class AnnDataSource:
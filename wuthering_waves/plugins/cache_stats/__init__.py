@@ -0,0 +1,40 @@
+from nonebot.permission import SUPERUSER
+from nonebot.plugin import PluginMetadata
+from nonebot_plugin_alconna import Alconna, Arparma, on_alconna
+from nonebot_plugin_uninfo import Uninfo
+
+from zhenxun.configs.utils import PluginExtraData
+from zhenxun.services.log import logger
+from zhenxun.utils.enum import PluginType
+from zhenxun.utils.message import MessageUtils
+
+from .data_source import CacheStatsDataSource
+
+__plugin_meta__ = PluginMetadata(
+    name="鸣潮缓存状态",
+    description="查看鸣潮插件各缓存的数量、命中率和内存占用",
+    usage="""
+    指令：
+        ww缓存状态
+    """.strip(),
+    extra=PluginExtraData(
+        author="HibiKier",
+        version="0.1",
+        menu_type="鸣潮",
+        plugin_type=PluginType.SUPERUSER,
+    ).to_dict(),
+)
+
+
+_matcher = on_alconna(
+    Alconna("ww缓存状态"),
+    permission=SUPERUSER,
+    priority=5,
+    block=True,
+)
+
+
+@_matcher.handle()
+async def _(session: Uninfo, arparma: Arparma):
+    await MessageUtils.build_message(CacheStatsDataSource.get_stats()).send()
+    logger.info("查看鸣潮缓存状态", arparma.header_result, session=session)
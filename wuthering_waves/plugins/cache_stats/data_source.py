@@ -0,0 +1,83 @@
+import time
+
+from ...handles.cookie import CookieHandler
+from ...utils.cache import cache_root
+from ...utils.cookie_pool import cookie_pool
+from ...utils.manager.resource_manager import WsResourceManager
+from ...utils.singleflight import SingleFlight
+
+
+def _format_bytes(value: float | None) -> str:
+    """格式化字节数
+
+    参数:
+        value: 字节数
+
+    返回:
+        str: 格式化后的文本
+    """
+    if value is None:
+        return "-"
+    for unit in ("B", "KB", "MB"):
+        if value < 1024:
+            return f"{value:.1f}{unit}"
+        value /= 1024
+    return f"{value:.1f}GB"
+
+
+class CacheStatsDataSource:
+    @classmethod
+    def get_stats(cls) -> str:
+        """获取各缓存的统计信息
+
+        返回:
+            str: 统计信息文本
+        """
+        summary = cache_root.summary()
+        lines = [
+            f"缓存数量: {summary['caches']}",
+            f"内存占用: {_format_bytes(summary['bytes'])}"
+            f" / {_format_bytes(summary['budget_bytes'])}",
+            f"超出预算淘汰: {summary['budget_evictions']}",
+        ]
+        stats = sorted(
+            cache_root.stats().items(),
+            key=lambda item: item[1]["bytes"] or 0,
+            reverse=True,
+        )
+        lines.extend(
+            f"{name}: {stat['size']}/{stat['maxsize']}项"
+            f" 命中率{stat['hit_rate']:.1%}"
+            f" 淘汰{stat['evictions']} 过期{stat['expirations']}"
+            f" 内存{_format_bytes(stat['bytes'])}"
+            for name, stat in stats
+        )
+        lines.append("请求合并:")
+        lines.extend(
+            f"{stat['name']}: 调用{stat['calls']} 合并{stat['coalesced']}"
+            f" 进行中{stat['in_flight']}"
+            for stat in SingleFlight.all_stats()
+        )
+        validate = CookieHandler.validate_stats
+        pool = cookie_pool.stats()
+        lines.extend(
+            [
+                f"cookie验证: 验证{validate['probes']} 缓存命中{validate['cache_hits']}"
+                f" 取消{validate['cancelled']}"
+                f" 节省{validate['saved_seconds']:.1f}秒",
+                f"cookie池: 可用{pool['healthy']} 隔离{pool['quarantined']}"
+                f" 取出{pool['checkouts']} 未命中{pool['misses']}",
+            ]
+        )
+        sync = WsResourceManager.sync_status()
+        last_sync = (
+            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sync["last_sync"]))
+            if sync["last_sync"]
+            else "从未同步"
+        )
+        lines.append(
+            f"表情同步: {sync['state']} 上次目录同步{last_sync}"
+            f" 耗时{sync['elapsed'] if sync['elapsed'] is not None else '-'}秒"
+            + (f" 错误: {sync['error']}" if sync["error"] else "")
+        )
+        return "\n".join(lines)
@@ -3,13 +3,13 @@ from ...exceptions import WavesException
 from ...handles.char import CharHandler
 from ...handles.cookie import CookieHandler
 from ...models.waves_user import WavesUser
+from ...utils.cache import TimedCache
 from ...utils.manager.entity_manager import EntityManager
-from ...utils.utils import TimedCache
 from ...waves_api import WavesApi
 from ...waves_api.api.user.models import BaseUserData
 from ...waves_api.error_code import ERROR_CODE, WAVES_CODE_100, WAVES_CODE_102
 
-cache = TimedCache(timeout=60)
+cache = TimedCache(timeout=60, name="char_info_refresh")
 
 
 def get_default_base_user_data(role_id: str):
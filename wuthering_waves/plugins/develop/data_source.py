@@ -79,10 +79,12 @@ class DevelopDataSource:
             template_role["roleId"] = no_owned_char_id
 
             char_name = EntityManager.id_to_name(no_owned_char_id)
-            if char_name:
-                weapon_id = EntityManager.get_weapon_alias(f"{char_name}专武")
-                if weapon_id:
-                    template_role["weaponId"] = EntityManager.name_to_id(weapon_id)
+            if (
+                char_name
+                and (weapon_name := EntityManager.get_signature_weapon(char_name))
+                and (weapon_id := EntityManager.get_weapon_id(weapon_name))
+            ):
+                template_role["weaponId"] = weapon_id
 
             content_list.append(template_role)
 
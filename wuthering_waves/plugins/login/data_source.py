@@ -3,7 +3,6 @@ import hashlib
 from pathlib import Path
 import uuid
 
-import async_timeout
 import nonebot
 from nonebot.adapters import Bot
 
@@ -14,13 +13,12 @@ from zhenxun.utils.platform import PlatformUtils
 from ...config import GAME_NAME, LOG_COMMAND, WEB_PREFIX, config
 from ...handles.cookie import CookieHandler
 from ...utils.pattern import CODE_PATTERN, MOBILE_PATTERN
-from ...utils.utils import QrCodeUtils, TimedCache, get_public_ip
+from ...utils.utils import QrCodeUtils, get_public_ip
 from ...waves_api import WavesApi
+from .session import LOGIN_TIMEOUT, LoginSessionStore
 
 driver = nonebot.get_driver()
 
-cache = TimedCache(timeout=600, maxsize=10)
-
 LOGIN_ERROR_MESSAGE = f"{GAME_NAME} 登录失败\n1.是否注册过库街区\n2.库街区能否查询当前{GAME_NAME}特征码数据\n"
 
 QR_RESULT_FORMAT = """
@@ -34,11 +32,6 @@ NORMAL_RESULT_FORMAT = """
 {}
 """.strip()
 
-# 添加常量定义
-LOGIN_TIMEOUT = 600  # 登录超时时间（秒）
-POLL_INTERVAL = 0.1  # 轮询间隔（秒）
-LOGIN_DATA_INIT = {"mobile": -1, "code": -1}
-
 
 class LoginManager:
     @classmethod
@@ -162,21 +155,10 @@ class LoginManager:
                 MessageUtils.build_message(*await cls.get_login(user_id, token)),
             )
 
-            # 检查是否已有完整的登录数据
-            result = cache.get(token)
-            if (
-                result
-                and cls._is_complete_login_data(result)
-                and isinstance(result, dict)
-            ):
-                text = f"{result['mobile']} {result['code']}"
-                cache.delete(token)
+            # 已有提交完成的会话时直接登录，否则创建新的登录会话
+            if text := await LoginSessionStore.create(token, user_id):
                 return await cls.code_login(user_id, text)
 
-            # 创建新的登录会话
-            data = {**LOGIN_DATA_INIT, "user_id": user_id}
-            cache.set(token, data)
-
             # 等待登录结果
             text = await cls._wait_for_login_completion(bot, user_id, group_id, token)
 
@@ -184,26 +166,19 @@ class LoginManager:
             return await cls.code_login(user_id, text)
 
         except Exception as e:
-            # 确保清理缓存
-            cache.delete(token)
+            # 确保清理会话
+            await LoginSessionStore.close(token)
             logger.error("页面登录过程中出现错误", LOG_COMMAND, session=user_id, e=e)
             await PlatformUtils.send_message(
                 bot, user_id, group_id, "用户登录过程中出现错误..."
             )
             return "登录过程中出现错误，请稍后重试"
 
-    @classmethod
-    def _is_complete_login_data(cls, result) -> bool:
-        """检查是否为完整的登录数据"""
-        if not isinstance(result, dict) or result is None:
-            return False
-        return result.get("mobile") != -1 and result.get("code") != -1
-
     @classmethod
     async def _wait_for_login_completion(
         cls, bot: Bot, user_id: str, group_id: str | None, token: str
     ) -> str:
-        """等待登录完成
+        """等待登录完成，网页提交后立即唤醒
 
         参数:
             bot: Bot
@@ -217,31 +192,12 @@ class LoginManager:
         异常:
             asyncio.TimeoutError: 登录超时
         """
-        try:
-            async with async_timeout.timeout(LOGIN_TIMEOUT):
-                while True:
-                    result = cache.get(token)
-
-                    if result is None:
-                        # 缓存被清理，说明超时
-                        await cls._send_timeout_message(bot, user_id, group_id)
-                        raise asyncio.TimeoutError("登录超时")
-
-                    if cls._is_complete_login_data(result):
-                        # 获取到完整的登录信息
-                        if result and isinstance(result, dict):
-                            text = f"{result['mobile']} {result['code']}"
-                            cache.delete(token)
-                            return text
-
-                    # 等待后再次检查
-                    await asyncio.sleep(POLL_INTERVAL)
-
-        except asyncio.TimeoutError:
-            # 超时处理
-            cache.delete(token)
+        text = await LoginSessionStore.wait(token, LOGIN_TIMEOUT)
+        await LoginSessionStore.close(token)
+        if text is None:
             await cls._send_timeout_message(bot, user_id, group_id)
-            raise
+            raise asyncio.TimeoutError("登录超时")
+        return text
 
     @classmethod
     async def _send_timeout_message(cls, bot: Bot, user_id: str, group_id: str | None):
@@ -4,11 +4,11 @@ from pathlib import Path
 from fastapi import APIRouter
 from fastapi.responses import HTMLResponse
 from jinja2 import Environment, FileSystemLoader
-from nonebot.compat import model_dump
 from pydantic import BaseModel
 
 from ...waves_api.config import MAIN_URL
-from .data_source import LoginManager, cache
+from .data_source import LoginManager
+from .session import LoginSessionStore
 
 TEMPLATE_PATH = Path(__file__).parent / "templates"
 # 创建Jinja2模板环境
@@ -28,7 +28,7 @@ class LoginModel(BaseModel):
 
 @router.get("/{token}")
 async def _(token: str):
-    temp = cache.get(token)
+    temp = await LoginSessionStore.get(token)
     if temp is None:
         template = waves_templates.get_template("404.html")
         return HTMLResponse(template.render())
@@ -48,10 +48,6 @@ async def _(token: str):
 
 @router.post("/go")
 async def waves_login(data: LoginModel):
-    temp = cache.get(data.auth)
-    if temp is None:
+    if not await LoginSessionStore.submit(data.auth, data.mobile, data.code):
         return {"success": False, "msg": "登录超时"}
-
-    temp.update(model_dump(data))
-    cache.set(data.auth, temp)
     return {"success": True}
@@ -0,0 +1,139 @@
+import asyncio
+from typing import Any, ClassVar
+
+from ...utils.cache_backend import MemoryBackend, create_backend
+
+LOGIN_TIMEOUT = 600
+"""登录超时时间（秒）"""
+
+SHARED_POLL_INTERVAL = 2
+"""使用共享缓存时检查其他进程提交结果的间隔（秒）"""
+
+
+class LoginSessionStore:
+    """页面登录会话
+
+    会话数据保存在缓存后端中，网页提交手机号和验证码后，
+    直接完成本进程中等待该会话的 Future，等待方不再轮询
+    """
+
+    _sessions = create_backend("login", ttl=LOGIN_TIMEOUT, maxsize=10000)
+    _waiters: ClassVar[dict[str, asyncio.Future[str | None]]] = {}
+
+    @classmethod
+    def _text(cls, session: Any) -> str | None:
+        """已提交的会话转换为登录文本
+
+        参数:
+            session: 会话数据
+
+        返回:
+            str | None: "手机号 验证码"，未提交时为None
+        """
+        if (
+            isinstance(session, dict)
+            and session.get("mobile") not in (None, -1)
+            and session.get("code") not in (None, -1)
+        ):
+            return f"{session['mobile']} {session['code']}"
+        return None
+
+    @classmethod
+    async def create(cls, token: str, user_id: str) -> str | None:
+        """创建会话，已有提交完成的会话时直接返回登录文本
+
+        参数:
+            token: 会话token
+            user_id: 用户ID
+
+        返回:
+            str | None: 已提交的登录文本
+        """
+        if text := cls._text(await cls._sessions.get(token)):
+            await cls.close(token)
+            return text
+        await cls._sessions.set(token, {"mobile": -1, "code": -1, "user_id": user_id})
+        if (future := cls._waiters.get(token)) is None or future.done():
+            cls._waiters[token] = asyncio.get_running_loop().create_future()
+        return None
+
+    @classmethod
+    async def get(cls, token: str) -> dict | None:
+        """获取会话数据
+
+        参数:
+            token: 会话token
+
+        返回:
+            dict | None: 会话数据，不存在或已过期时为None
+        """
+        return await cls._sessions.get(token)
+
+    @classmethod
+    async def submit(cls, token: str, mobile: str, code: str) -> bool:
+        """提交手机号和验证码，唤醒等待中的会话
+
+        参数:
+            token: 会话token
+            mobile: 手机号
+            code: 验证码
+
+        返回:
+            bool: 会话是否存在
+        """
+        session = await cls._sessions.get(token)
+        if session is None:
+            return False
+        session = {**session, "mobile": mobile, "code": code}
+        await cls._sessions.set(token, session)
+        if (future := cls._waiters.get(token)) and not future.done():
+            future.set_result(f"{mobile} {code}")
+        return True
+
+    @classmethod
+    async def wait(cls, token: str, timeout: float = LOGIN_TIMEOUT) -> str | None:
+        """等待会话提交
+
+        参数:
+            token: 会话token
+            timeout: 超时时间（秒）
+
+        返回:
+            str | None: 登录文本，超时或会话已关闭时为None
+        """
+        future = cls._waiters.get(token)
+        if future is None:
+            return None
+        if isinstance(cls._sessions, MemoryBackend):
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+        # 共享缓存时提交可能落在其他进程，低频检查一次缓存作为兜底
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                return await asyncio.wait_for(
+                    asyncio.shield(future), min(SHARED_POLL_INTERVAL, remaining)
+                )
+            except asyncio.TimeoutError:
+                session = await cls._sessions.get(token)
+                if session is None:
+                    return None
+                if text := cls._text(session):
+                    return text
+        return None
+
+    @classmethod
+    async def close(cls, token: str):
+        """关闭会话
+
+        参数:
+            token: 会话token
+        """
+        await cls._sessions.delete(token)
+        # 同一会话的其他等待方一并结束
+        if (future := cls._waiters.pop(token, None)) and not future.done():
+            future.set_result(None)
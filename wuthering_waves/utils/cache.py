@@ -1,31 +1,149 @@
-from typing import Any
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+import heapq
+import itertools
+import sys
+import threading
+import time
+from typing import Any, NamedTuple
+
+from ..config import config
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """估算对象占用的内存（字节）
+
+    递归累加容器和对象属性的大小，层级过深时只计算当前对象
+
+    参数:
+        value: 对象
+
+    返回:
+        int: 估算的字节数
+    """
+    size = sys.getsizeof(value)
+    if _depth >= 6:
+        return size
+    if isinstance(value, dict):
+        size += sum(
+            estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+            for k, v in value.items()
+        )
+    elif isinstance(value, list | tuple | set | frozenset):
+        size += sum(estimate_size(item, _depth + 1) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += estimate_size(vars(value), _depth + 1)
+    return size
+
+
+class CachePolicy(NamedTuple):
+    """缓存策略"""
+
+    ttl: float | None = None
+    """过期时间（秒），为None时不过期"""
+    max_entries: int = 10000
+    """最大数量"""
+    max_bytes: int | None = None
+    """最大内存（字节），为None时不限制"""
+    priority: int | None = 1
+    """超出总内存预算时的淘汰优先级，数值小的先淘汰，为None时不参与预算淘汰"""
 
 
 class NamespacedCache:
     """缓存管理器
 
-    管理所有Cache实例，提供创建和获取Cache的功能
+    管理所有Cache实例，提供创建和获取Cache的功能，
+    同时登记所有命名的TimedCache，统计命中率和内存占用，
+    统计内存的缓存总量超出预算时按淘汰优先级从低到高，
+    同一优先级从占用最多的缓存开始淘汰
     """
 
-    def __init__(self):
-        """初始化缓存管理器"""
+    def __init__(self, budget_bytes: int | None = None):
+        """初始化缓存管理器
+
+        参数:
+            budget_bytes: 统计内存的缓存总内存预算（字节），为None时不限制
+        """
+        self.budget_bytes = budget_bytes
+        self.budget_evictions = 0
+        """因超出总预算被淘汰的数量"""
         # 存储所有创建的Cache实例
         self._caches: dict[str, "Cache"] = {}
+        # 注册的TimedCache实例
+        self._timed: dict[str, "TimedCache"] = {}
+
+    def register(self, cache: "TimedCache") -> None:
+        """注册TimedCache，同名缓存会被替换
+
+        参数:
+            cache: TimedCache实例
+        """
+        if cache.name:
+            self._timed[cache.name] = cache
+
+    def get_timed(self, name: str) -> "TimedCache | None":
+        """获取已注册的TimedCache
+
+        参数:
+            name: 缓存名称
+
+        返回:
+            TimedCache实例，如果不存在则返回None
+        """
+        return self._timed.get(name)
+
+    def enforce_budget(self) -> None:
+        """总内存超出预算时，从优先级最低、占用最多的缓存中淘汰最久未使用的项"""
+        if not self.budget_bytes:
+            return
+        tracked = [c for c in self._timed.values() if c.track_bytes]
+        total = sum(c.cost for c in tracked)
+        candidates = [c for c in tracked if c.priority is not None]
+        while total > self.budget_bytes and candidates:
+            cache = min(candidates, key=lambda c: (c.priority, -c.cost))
+            freed = cache.evict_oldest()
+            if freed is None:
+                candidates.remove(cache)
+                continue
+            total -= freed
+            self.budget_evictions += 1
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """所有已注册TimedCache的统计信息
 
-    def new(self, key: str) -> "Cache":
+        返回:
+            缓存名称到统计信息的映射
+        """
+        return {name: cache.stats() for name, cache in self._timed.items()}
+
+    def summary(self) -> dict[str, Any]:
+        """全局统计
+
+        返回:
+            dict[str, Any]: 缓存数量、统计内存的总占用、预算和预算淘汰次数
+        """
+        return {
+            "caches": len(self._timed),
+            "bytes": sum(c.cost for c in self._timed.values() if c.track_bytes),
+            "budget_bytes": self.budget_bytes,
+            "budget_evictions": self.budget_evictions,
+        }
+
+    def new(self, key: str, policy: CachePolicy | None = None) -> "Cache":
         """创建或获取一个Cache实例
 
         如果指定key的Cache已存在，则返回已有实例
-        否则创建一个新的Cache实例
+        否则按策略创建一个新的Cache实例
 
         参数:
             key: 缓存标识符
+            policy: 缓存策略，默认不过期、最多10000项
 
         返回:
             Cache实例
         """
         if key not in self._caches:
-            self._caches[key] = Cache(key)
+            self._caches[key] = Cache(key, policy or CachePolicy())
         return self._caches[key]
 
     def get_cache(self, key: str) -> "Cache | None":
@@ -47,11 +165,12 @@ class NamespacedCache:
         """
         if key in self._caches:
             del self._caches[key]
+            self._timed.pop(key, None)
 
     def clear_all(self) -> None:
-        """清空所有Cache实例"""
-        for cache in self._caches.values():
-            cache.clear()
+        """清空所有缓存"""
+        for timed in self._timed.values():
+            timed.clear()
 
     def get_all_keys(self) -> list[str]:
         """获取所有Cache的key列表
@@ -63,19 +182,28 @@ class NamespacedCache:
 
 
 class Cache:
-    """普通缓存类
+    """命名空间缓存
 
-    提供简单的键值存储接口
+    按策略限制过期时间、数量和内存，提供简单的键值存储接口
     """
 
-    def __init__(self, name: str):
+    def __init__(self, name: str, policy: CachePolicy):
         """初始化缓存
 
         参数:
             name: 缓存名称
+            policy: 缓存策略
         """
         self._name = name
-        self._cache: dict[str, Any] = {}
+        self.policy = policy
+        self._store = TimedCache(
+            timeout=float("inf") if policy.ttl is None else policy.ttl,
+            maxsize=policy.max_entries,
+            name=name,
+            max_cost=policy.max_bytes,
+            track_bytes=True,
+            priority=policy.priority,
+        )
 
     @property
     def name(self) -> str:
@@ -89,9 +217,9 @@ class Cache:
             key: 缓存键
 
         返回:
-            缓存值，不存在则返回None
+            缓存值，不存在或已过期则返回None
         """
-        return self._cache.get(key)
+        return self._store.get(key)
 
     def set(self, key: str, value: Any) -> None:
         """设置缓存值
@@ -100,7 +228,7 @@ class Cache:
             key: 缓存键
             value: 缓存值
         """
-        self._cache[key] = value
+        self._store.set(key, value)
 
     def delete(self, key: str) -> None:
         """删除缓存项
@@ -108,12 +236,11 @@ class Cache:
         参数:
             key: 缓存键
         """
-        if key in self._cache:
-            del self._cache[key]
+        self._store.delete(key)
 
     def clear(self) -> None:
         """清空所有缓存"""
-        self._cache.clear()
+        self._store.clear()
 
     def has_key(self, key: str) -> bool:
         """检查是否存在某个键
@@ -124,23 +251,279 @@ class Cache:
         返回:
             是否存在该键
         """
-        return key in self._cache
+        return key in self._store
 
     def get_all(self) -> dict[str, Any]:
-        """获取所有缓存数据
+        """获取所有未过期的缓存数据
 
         返回:
             所有缓存数据字典
         """
-        return self._cache.copy()
+        return {
+            key: value
+            for key in self._store.keys()
+            if (value := self._store.get(key)) is not None
+        }
+
+    def stats(self) -> dict[str, Any]:
+        """统计信息
+
+        返回:
+            dict[str, Any]: 统计信息
+        """
+        return self._store.stats()
 
     def __len__(self) -> int:
         """返回缓存中的项目数量"""
-        return len(self._cache)
+        return len(self._store)
+
+
+class TimedCache:
+    """基于时间的缓存实现
+
+    支持按数量和按成本限制容量，过期时间按堆排列，
+    清理过期项只需处理已过期的部分，容量不足时淘汰最久未使用的项，
+    所有操作加锁，可以在线程中使用
+
+    属性:
+        timeout: 默认过期时间（秒）
+        maxsize: 最大数量
+        max_cost: 最大总成本，为None时不限制
+    """
+
+    def __init__(
+        self,
+        timeout: float = 60,
+        maxsize: int = 100,
+        *,
+        name: str | None = None,
+        max_cost: float | None = None,
+        cost_func: Callable[[Any], float] | None = None,
+        track_bytes: bool = False,
+        priority: int | None = 1,
+    ):
+        """初始化缓存
+
+        参数:
+            timeout: 默认过期时间（秒），默认60秒
+            maxsize: 最大数量，默认100项
+            name: 缓存名称，指定时注册到全局缓存管理器
+            max_cost: 最大总成本，为None时不限制
+            cost_func: 计算缓存值成本的函数，默认每项成本为1
+            track_bytes: 是否以估算的内存字节数作为成本，计入全局内存预算
+            priority: 超出全局内存预算时的淘汰优先级，数值小的先淘汰，
+                为None时不参与预算淘汰
+        """
+        self.cache: OrderedDict[Hashable, tuple[Any, float, float]] = OrderedDict()
+        """缓存键到值、过期时间和成本，按访问顺序排列"""
+        self.timeout = timeout
+        self.maxsize = maxsize
+        self.max_cost = max_cost
+        self.name = name
+        self.track_bytes = track_bytes
+        self.priority = priority
+        self._cost_func = estimate_size if track_bytes else cost_func
+        self._cost = 0.0
+        self._heap: list[tuple[float, int, Hashable]] = []
+        self._counter = itertools.count()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if name:
+            cache_root.register(self)
+
+    def _remove(self, key: Hashable):
+        """删除缓存项并扣除成本，调用方需持有锁"""
+        _, _, cost = self.cache.pop(key)
+        self._cost -= cost
+
+    def _purge_expired(self, now: float):
+        """按过期时间从堆顶清理已过期的项，调用方需持有锁"""
+        while self._heap and self._heap[0][0] <= now:
+            expiry, _, key = heapq.heappop(self._heap)
+            # 键被更新过时堆中的记录已失效
+            if (item := self.cache.get(key)) and item[1] == expiry:
+                self._remove(key)
+                self.expirations += 1
+        # 同一个键反复更新会在堆中留下失效记录，过多时重建
+        if len(self._heap) > 2 * len(self.cache) + 64:
+            self._heap = [
+                (expiry, next(self._counter), key)
+                for key, (_, expiry, _) in self.cache.items()
+            ]
+            heapq.heapify(self._heap)
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: float | None = None,
+        cost: float | None = None,
+    ):
+        """设置缓存项
+
+        如果键已存在，会更新值并刷新过期时间，
+        容量不足时先清理过期项，仍然不足时淘汰最久未使用的项
+
+        参数:
+            key: 缓存键
+            value: 缓存值
+            ttl: 过期时间（秒），默认使用timeout
+            cost: 成本，默认使用cost_func计算
+        """
+        if cost is None:
+            cost = self._cost_func(value) if self._cost_func else 1
+        now = time.time()
+        expiry = now + (self.timeout if ttl is None else ttl)
+        with self._lock:
+            if key in self.cache:
+                self._remove(key)
+            self._purge_expired(now)
+            while self.cache and (
+                len(self.cache) >= self.maxsize
+                or (self.max_cost is not None and self._cost + cost > self.max_cost)
+            ):
+                self._remove(next(iter(self.cache)))
+                self.evictions += 1
+            self.cache[key] = (value, expiry, cost)
+            self._cost += cost
+            heapq.heappush(self._heap, (expiry, next(self._counter), key))
+        if self.track_bytes and self.name:
+            # 在释放自身锁之后检查总预算，避免两个缓存互相等待
+            cache_root.enforce_budget()
+
+    def evict_oldest(self) -> float | None:
+        """淘汰最久未使用的项
+
+        返回:
+            float | None: 释放的成本，缓存为空时为None
+        """
+        with self._lock:
+            if not self.cache:
+                return None
+            key = next(iter(self.cache))
+            cost = self.cache[key][2]
+            self._remove(key)
+            self.evictions += 1
+            return cost
+
+    @property
+    def cost(self) -> float:
+        """当前总成本"""
+        return self._cost
+
+    def get(self, key: Hashable) -> Any:
+        """获取缓存项
+
+        如果键存在且未过期，返回值并刷新访问顺序
+        如果键不存在或已过期，返回None
+
+        参数:
+            key: 缓存键
+
+        返回:
+            缓存值或None（如果不存在或已过期）
+        """
+        with self._lock:
+            item = self.cache.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            if time.time() >= item[1]:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def delete(self, key: Hashable):
+        """删除缓存项
+
+        参数:
+            key: 要删除的缓存键
+        """
+        with self._lock:
+            if key in self.cache:
+                self._remove(key)
+
+    def keys(self) -> list:
+        """当前所有缓存键，可能包含已过期但尚未清理的键
+
+        返回:
+            list: 缓存键列表
+        """
+        with self._lock:
+            return list(self.cache)
+
+    def items(self) -> list[tuple[Hashable, Any]]:
+        """当前所有未过期的缓存项，不计入命中统计也不刷新访问顺序
+
+        返回:
+            list[tuple[Hashable, Any]]: 缓存键和值列表
+        """
+        now = time.time()
+        with self._lock:
+            return [
+                (key, value)
+                for key, (value, expiry, _) in self.cache.items()
+                if now < expiry
+            ]
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self.cache.clear()
+            self._heap.clear()
+            self._cost = 0.0
+
+    def stats(self) -> dict[str, Any]:
+        """统计信息
+
+        返回:
+            dict[str, Any]: 命中、未命中、淘汰、过期次数，当前数量和总成本
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self.cache),
+                "maxsize": self.maxsize,
+                "cost": self._cost,
+                "max_cost": self.max_cost,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "bytes": self._cost if self.track_bytes else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def __contains__(self, key: Hashable) -> bool:
+        """检查键是否存在且未过期，不刷新访问顺序
+
+        参数:
+            key: 缓存键
+
+        返回:
+            bool: 是否存在
+        """
+        with self._lock:
+            return key in self.cache and time.time() < self.cache[key][1]
+
+    def __len__(self):
+        """返回缓存中的项目数量"""
+        return len(self.cache)
 
 
 # 创建全局缓存管理器实例
-cache_root = NamespacedCache()
+cache_root = NamespacedCache(budget_bytes=config.cache_budget_mb * 1024 * 1024 or None)
 
 
-token_cache = cache_root.new("request_token")
+token_cache = cache_root.new(
+    "request_token",
+    # 淘汰后需要重新请求access_token，只受数量限制
+    CachePolicy(ttl=60 * 60 * 24, max_entries=2000, priority=None),
+)
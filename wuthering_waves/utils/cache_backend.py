@@ -0,0 +1,305 @@
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Hashable
+from functools import wraps
+import hashlib
+import inspect
+import json as std_json
+import time
+from typing import Any, ClassVar, TypeVar, get_type_hints
+
+from nonebot.compat import PYDANTIC_V2, model_dump, type_validate_python
+from pydantic import BaseModel
+import ujson as json
+
+from zhenxun.services.log import logger
+
+from ..config import LOG_COMMAND, config
+from .cache import TimedCache
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def to_jsonable(value: Any) -> Any:
+    """将值转换为可以跨进程传递的数据，模型按别名导出以便重新校验
+
+    参数:
+        value: 值
+
+    返回:
+        Any: 只包含基础类型的数据
+    """
+    if PYDANTIC_V2:
+        from pydantic_core import to_jsonable_python
+
+        return to_jsonable_python(value, by_alias=True)
+    from pydantic.json import pydantic_encoder
+
+    def default(obj: Any) -> Any:
+        if isinstance(obj, BaseModel):
+            return obj.dict(by_alias=True)
+        return pydantic_encoder(obj)
+
+    return std_json.loads(std_json.dumps(value, default=default))
+
+
+def dumps(value: Any) -> bytes:
+    """序列化缓存值，pydantic模型先转换为字典
+
+    安装了msgpack时使用msgpack，否则使用json，首字节标记格式
+
+    参数:
+        value: 缓存值
+
+    返回:
+        bytes: 序列化结果
+    """
+    if isinstance(value, BaseModel):
+        value = model_dump(value)
+    if msgpack:
+        return b"m" + msgpack.packb(value, use_bin_type=True)
+    return b"j" + json.dumps(value, ensure_ascii=False).encode()
+
+
+def loads(data: bytes) -> Any:
+    """反序列化缓存值
+
+    参数:
+        data: 序列化结果
+
+    返回:
+        Any: 缓存值
+    """
+    if data[:1] == b"m":
+        if not msgpack:
+            raise RuntimeError("缓存数据使用msgpack序列化，但未安装msgpack")
+        return msgpack.unpackb(data[1:], raw=False)
+    return json.loads(data[1:])
+
+
+class CacheBackend(ABC):
+    """缓存后端"""
+
+    def __init__(self, namespace: str, ttl: float | None, maxsize: int):
+        """初始化
+
+        参数:
+            namespace: 命名空间
+            ttl: 默认过期时间（秒），为None时不过期
+            maxsize: 最大数量，仅对内存后端生效
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.maxsize = maxsize
+
+    @abstractmethod
+    async def get(self, key: Hashable) -> Any:
+        """获取缓存值，不存在时返回None"""
+
+    @abstractmethod
+    async def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        """设置缓存值，ttl为None时使用默认过期时间"""
+
+    @abstractmethod
+    async def delete(self, key: Hashable):
+        """删除缓存值"""
+
+
+class MemoryBackend(CacheBackend):
+    """进程内缓存后端"""
+
+    def __init__(self, namespace: str, ttl: float | None, maxsize: int):
+        super().__init__(namespace, ttl, maxsize)
+        self._cache = TimedCache(
+            timeout=float("inf") if ttl is None else ttl,
+            maxsize=maxsize,
+            name=namespace,
+        )
+
+    async def get(self, key: Hashable) -> Any:
+        return self._cache.get(key)
+
+    async def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        self._cache.set(key, value, ttl)
+
+    async def delete(self, key: Hashable):
+        self._cache.delete(key)
+
+
+class RedisBackend(CacheBackend):
+    """Redis协议缓存后端，多个进程共享数据"""
+
+    _clients: ClassVar[dict[str, Any]] = {}
+
+    def __init__(
+        self, namespace: str, ttl: float | None, maxsize: int, client: Any = None
+    ):
+        """初始化
+
+        参数:
+            namespace: 命名空间
+            ttl: 默认过期时间（秒），为None时不过期
+            maxsize: 未使用，与其他后端保持一致
+            client: Redis客户端，为None时按配置的地址创建并在进程内共享
+        """
+        super().__init__(namespace, ttl, maxsize)
+        if client is None:
+            from redis import asyncio as aioredis
+
+            url = config.cache_backend.redis_url
+            if url not in self._clients:
+                self._clients[url] = aioredis.Redis.from_url(url)
+            client = self._clients[url]
+        self._client = client
+
+    def _key(self, key: Hashable) -> str:
+        """生成Redis键
+
+        参数:
+            key: 缓存键
+
+        返回:
+            str: Redis键
+        """
+        return f"{config.cache_backend.prefix}:{self.namespace}:{key}"
+
+    async def get(self, key: Hashable) -> Any:
+        data = await self._client.get(self._key(key))
+        return None if data is None else loads(data)
+
+    async def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        await self._client.set(
+            self._key(key), dumps(value), px=int(ttl * 1000) if ttl else None
+        )
+
+    async def delete(self, key: Hashable):
+        await self._client.delete(self._key(key))
+
+
+def _redis_enabled() -> bool:
+    """是否配置并可以使用Redis后端
+
+    返回:
+        bool: 是否使用Redis后端
+    """
+    if config.cache_backend.type != "redis":
+        return False
+    try:
+        import redis.asyncio  # noqa: F401
+    except ImportError:
+        logger.warning("未安装redis，缓存后端回退为内存", LOG_COMMAND)
+        return False
+    return True
+
+
+def create_backend(
+    namespace: str, ttl: float | None = None, maxsize: int = 1000
+) -> CacheBackend:
+    """按配置创建缓存后端
+
+    参数:
+        namespace: 命名空间
+        ttl: 默认过期时间（秒），为None时不过期
+        maxsize: 最大数量，仅对内存后端生效
+
+    返回:
+        CacheBackend: 缓存后端
+    """
+    if _redis_enabled():
+        return RedisBackend(namespace, ttl, maxsize)
+    return MemoryBackend(namespace, ttl, maxsize)
+
+
+def create_shared_backend(
+    namespace: str, ttl: float | None = None
+) -> CacheBackend | None:
+    """创建多进程共享的缓存后端，未配置Redis时返回None
+
+    参数:
+        namespace: 命名空间
+        ttl: 默认过期时间（秒），为None时不过期
+
+    返回:
+        CacheBackend | None: 缓存后端
+    """
+    return RedisBackend(namespace, ttl, 0) if _redis_enabled() else None
+
+
+def shared_cached(
+    namespace: str, ttl: float, maxsize: int = 100, ignore: tuple[str, ...] = ()
+):
+    """缓存协程函数的结果
+
+    先读取进程内缓存，未命中时读取多进程共享的缓存后端（需配置Redis），
+    共享缓存中的结果按函数返回类型重新构造
+
+    参数:
+        namespace: 命名空间
+        ttl: 缓存时间（秒）
+        maxsize: 进程内最大缓存数量
+        ignore: 不参与生成缓存键的参数名，cls 和 self 始终忽略
+
+    使用示例:
+        @classmethod
+        @shared_cached("online_list_role", ttl=60 * 60, ignore=("cookie",))
+        async def get_online_list_role(cls, cookie: str) -> list[RoleItem]: ...
+    """
+
+    def decorator(func: F) -> F:
+        signature = inspect.signature(func)
+        local = TimedCache(timeout=ttl, maxsize=maxsize, name=namespace)
+        shared = create_shared_backend(namespace, ttl=ttl)
+        skipped = {"cls", "self", *ignore}
+        return_types: list[Any] = []
+        """首次读取共享缓存时解析的返回类型"""
+
+        def build_key(args: tuple, kwargs: dict) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = sorted(
+                (k, repr(v)) for k, v in bound.arguments.items() if k not in skipped
+            )
+            return hashlib.sha1(repr(arguments).encode()).hexdigest()[:16]
+
+        async def get_shared(key: str) -> tuple[tuple[Any], float] | None:
+            if not return_types:
+                try:
+                    return_types.append(get_type_hints(func).get("return"))
+                except Exception as e:
+                    logger.debug(f"无法解析 {namespace} 返回类型", LOG_COMMAND, e=e)
+                    return_types.append(None)
+            item = await shared.get(key)  # type: ignore
+            if not item or return_types[0] is None:
+                return None
+            stored_at, data = item
+            try:
+                return (type_validate_python(return_types[0], data),), stored_at
+            except Exception as e:
+                logger.debug(f"共享缓存 {namespace} 构造失败", LOG_COMMAND, e=e)
+                return None
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = build_key(args, kwargs)
+            # 结果包装为元组缓存，结果为None时同样缓存
+            if (cached := local.get(key)) is not None:
+                return cached[0]
+            if shared and (item := await get_shared(key)):
+                cached, stored_at = item
+                # 进程内只保留共享缓存剩余的时间
+                local.set(key, cached, ttl - (time.time() - stored_at))
+                return cached[0]
+            value = await func(*args, **kwargs)
+            local.set(key, (value,))
+            if shared:
+                await shared.set(key, [time.time(), to_jsonable(value)])
+            return value
+
+        return wrapper  # type: ignore
+
+    return decorator
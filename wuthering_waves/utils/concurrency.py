@@ -0,0 +1,90 @@
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+import time
+
+
+class AdaptiveConcurrency:
+    """自适应并发控制
+
+    请求延迟和错误率正常时逐步放大并发窗口，
+    遇到限流或验证码时窗口减半并暂停一段时间（AIMD）
+    """
+
+    ERROR_WINDOW = 20
+    """计算错误率的最近请求数量"""
+    ERROR_RATE = 0.2
+    """最近请求错误率超过该值时缩小窗口"""
+
+    def __init__(
+        self,
+        initial: int = 2,
+        min_limit: int = 1,
+        max_limit: int = 8,
+        latency_threshold: float = 2.0,
+        cooldown: float = 3.0,
+    ):
+        """初始化
+
+        参数:
+            initial: 初始并发数
+            min_limit: 最小并发数
+            max_limit: 最大并发数
+            latency_threshold: 健康请求的最大延迟（秒）
+            cooldown: 触发限流后的暂停时间（秒）
+        """
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.limit = min(max(initial, min_limit), self.max_limit)
+        self.latency_threshold = latency_threshold
+        self.cooldown = cooldown
+        self._in_flight = 0
+        self._healthy_streak = 0
+        self._recent: deque[bool] = deque(maxlen=self.ERROR_WINDOW)
+        """最近请求是否出错"""
+        self._pause_until = 0.0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slot(self):
+        """占用一个并发位置"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        try:
+            if (delay := self._pause_until - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+            yield
+        finally:
+            async with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def on_success(self, latency: float):
+        """记录成功请求，需要在slot内调用，释放位置时等待的任务才能看到放大的窗口
+
+        参数:
+            latency: 请求耗时（秒）
+        """
+        self._recent.append(False)
+        if latency > self.latency_threshold:
+            self._healthy_streak = 0
+            return
+        self._healthy_streak += 1
+        # 连续一个窗口的请求都健康时窗口加一
+        if self._healthy_streak >= self.limit and self.limit < self.max_limit:
+            self.limit += 1
+            self._healthy_streak = 0
+
+    def on_error(self):
+        """记录普通错误，最近请求的错误率过高时窗口减一"""
+        self._recent.append(True)
+        self._healthy_streak = 0
+        if sum(self._recent) / len(self._recent) > self.ERROR_RATE:
+            self.limit = max(self.min_limit, self.limit - 1)
+
+    def on_throttle(self):
+        """记录限流，窗口减半并暂停"""
+        self._healthy_streak = 0
+        self.limit = max(self.min_limit, self.limit // 2)
+        self._pause_until = time.monotonic() + self.cooldown
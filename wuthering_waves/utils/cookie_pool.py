@@ -0,0 +1,134 @@
+from collections import OrderedDict
+import time
+from typing import Any
+
+
+class CookiePool:
+    """已验证可用的cookie池
+
+    取出时返回最久未使用的cookie并移到队尾，轮流使用池中的cookie，
+    登录失效的cookie立即移入隔离区，补充cookie池时跳过隔离中的角色，
+    隔离超过一段时间后释放，重新参与补充时的验证
+    """
+
+    def __init__(self):
+        self._healthy: OrderedDict[str, str] = OrderedDict()
+        """角色ID到cookie，按最近使用时间排序"""
+        self._quarantined: dict[str, float] = {}
+        """隔离的角色ID到隔离时间"""
+        self.checkouts = 0
+        """取出次数"""
+        self.misses = 0
+        """池为空导致取出失败的次数"""
+
+    def __len__(self) -> int:
+        return len(self._healthy)
+
+    def __contains__(self, role_id: str) -> bool:
+        return role_id in self._healthy
+
+    def add(self, role_id: str, cookie: str):
+        """加入验证通过的cookie
+
+        参数:
+            role_id: 角色ID
+            cookie: cookie
+        """
+        self._quarantined.pop(role_id, None)
+        self._healthy[role_id] = cookie
+
+    def checkout(self) -> tuple[str, str] | None:
+        """取出最久未使用的cookie
+
+        返回:
+            tuple[str, str] | None: 角色ID和cookie，池为空时为None
+        """
+        if not self._healthy:
+            self.misses += 1
+            return None
+        self.checkouts += 1
+        role_id, cookie = next(iter(self._healthy.items()))
+        self._healthy.move_to_end(role_id)
+        return role_id, cookie
+
+    def quarantine(self, role_id: str):
+        """隔离登录失效的cookie
+
+        参数:
+            role_id: 角色ID
+        """
+        self._healthy.pop(role_id, None)
+        self._quarantined[role_id] = time.time()
+
+    def quarantine_cookie(self, cookie: str) -> list[str]:
+        """按cookie隔离，借用的cookie失效时查询的角色与cookie所属角色不同
+
+        参数:
+            cookie: 登录失效的cookie
+
+        返回:
+            list[str]: 被隔离的角色ID列表
+        """
+        role_ids = [r for r, c in self._healthy.items() if c == cookie]
+        for role_id in role_ids:
+            self.quarantine(role_id)
+        return role_ids
+
+    def is_quarantined(self, role_id: str) -> bool:
+        """是否已被隔离
+
+        参数:
+            role_id: 角色ID
+
+        返回:
+            bool: 是否已被隔离
+        """
+        return role_id in self._quarantined
+
+    def release(self, role_id: str):
+        """解除隔离，如角色重新登录后
+
+        参数:
+            role_id: 角色ID
+        """
+        self._quarantined.pop(role_id, None)
+
+    def release_expired(self, max_age: float) -> int:
+        """释放隔离超过指定时间的角色
+
+        参数:
+            max_age: 隔离时间（秒）
+
+        返回:
+            int: 释放数量
+        """
+        deadline = time.time() - max_age
+        expired = [r for r, t in self._quarantined.items() if t <= deadline]
+        for role_id in expired:
+            del self._quarantined[role_id]
+        return len(expired)
+
+    def items(self) -> list[tuple[str, str]]:
+        """当前池中的cookie
+
+        返回:
+            list[tuple[str, str]]: 角色ID和cookie列表
+        """
+        return list(self._healthy.items())
+
+    def stats(self) -> dict[str, Any]:
+        """统计信息
+
+        返回:
+            dict[str, Any]: 可用数量、隔离数量、取出次数和未命中次数
+        """
+        return {
+            "healthy": len(self._healthy),
+            "quarantined": len(self._quarantined),
+            "checkouts": self.checkouts,
+            "misses": self.misses,
+        }
+
+
+cookie_pool = CookiePool()
+"""公共cookie池，自身cookie均失效时从这里借用"""
@@ -0,0 +1,73 @@
+from typing import ClassVar, NamedTuple
+
+from .cache import TimedCache
+
+CREDENTIAL_TTL = 600
+"""凭据缓存时间（秒）"""
+
+
+class Credential(NamedTuple):
+    """请求头所需的用户凭据"""
+
+    platform: str | None
+    access_token: str | None
+    device_id: str | None
+    role_id: str | None
+
+
+class CredentialCache:
+    """请求头凭据缓存
+
+    按 (cookie, role_id) 缓存用户的平台、access_token 和设备id，
+    未找到用户时也会缓存，避免每次请求都查询数据库，
+    用户登录、失效或 access_token 变化时需要主动清除
+    """
+
+    _cache: ClassVar[TimedCache] = TimedCache(
+        timeout=CREDENTIAL_TTL, maxsize=5000, name="credentials"
+    )
+
+    @classmethod
+    def get(cls, cookie: str, role_id: str | None) -> Credential | None | bool:
+        """获取凭据
+
+        参数:
+            cookie: cookie
+            role_id: 角色id
+
+        返回:
+            Credential | None | bool: 凭据，未找到用户时为False，没有缓存时为None
+        """
+        return cls._cache.get((cookie, role_id))
+
+    @classmethod
+    def set(cls, cookie: str, role_id: str | None, credential: Credential | None):
+        """写入凭据
+
+        参数:
+            cookie: cookie
+            role_id: 角色id
+            credential: 凭据，未找到用户时为None
+        """
+        cls._cache.set((cookie, role_id), credential or False)
+
+    @classmethod
+    def invalidate(cls, *, cookie: str | None = None, role_id: str | None = None):
+        """清除凭据，都为空时清除全部
+
+        参数:
+            cookie: 清除该cookie的凭据
+            role_id: 清除该角色的凭据
+        """
+        if not cookie and not role_id:
+            cls._cache.clear()
+            return
+        # 遍历原始缓存项，不影响命中统计和淘汰顺序
+        for key, value in cls._cache.items():
+            key_cookie, key_role_id = key
+            if (
+                (cookie and key_cookie == cookie)
+                or (role_id and key_role_id == role_id)
+                or (role_id and value and value.role_id == role_id)
+            ):
+                cls._cache.delete(key)
@@ -0,0 +1,179 @@
+import bisect
+
+from zhenxun.utils.utils import cn2py
+
+
+class AliasIndex:
+    """别名索引
+
+    加载时预先建立别名和拼音到正式名称的哈希索引，
+    查询时不再遍历所有别名分组
+    """
+
+    def __init__(self, groups: dict[str, list[str]]):
+        """初始化
+
+        参数:
+            groups: 正式名称到别名列表的映射
+        """
+        self.exact: dict[str, str] = {}
+        """别名到正式名称"""
+        self.pinyin: dict[str, str] = {}
+        """正式名称拼音到正式名称"""
+        self.order: dict[str, int] = {}
+        """正式名称在文件中的位置"""
+        # 按文件顺序写入，重复的别名以先出现的分组为准
+        for pos, (canonical, aliases) in enumerate(groups.items()):
+            self.order[canonical] = pos
+            for alias in aliases:
+                self.exact.setdefault(alias, canonical)
+            self.pinyin.setdefault(cn2py(canonical), canonical)
+        self._sorted_keys = sorted({*self.exact, *groups})
+        self._key_map = {**{c: c for c in groups}, **self.exact}
+
+    def __len__(self) -> int:
+        return len(self._key_map)
+
+    def get(self, name: str, fuzzy: bool = False) -> str | None:
+        """获取正式名称
+
+        参数:
+            name: 名称或别名
+            fuzzy: 精确匹配失败时是否按前缀模糊匹配
+
+        返回:
+            str | None: 正式名称
+        """
+        # 别名和拼音同时匹配到不同分组时，与逐个分组检查一样取文件中靠前的分组
+        matched = [
+            canonical
+            for canonical in (self.exact.get(name), self.pinyin.get(cn2py(name)))
+            if canonical
+        ]
+        if matched:
+            return min(matched, key=self.order.__getitem__)
+        return self.prefix(name) if fuzzy else None
+
+    def prefix(self, name: str) -> str | None:
+        """按前缀匹配正式名称，匹配到多个不同名称时视为失败
+
+        参数:
+            name: 名称前缀
+
+        返回:
+            str | None: 正式名称
+        """
+        if not name:
+            return None
+        matched: set[str] = set()
+        index = bisect.bisect_left(self._sorted_keys, name)
+        while index < len(self._sorted_keys):
+            key = self._sorted_keys[index]
+            if not key.startswith(name):
+                break
+            matched.add(self._key_map[key])
+            if len(matched) > 1:
+                return None
+            index += 1
+        return matched.pop() if matched else None
+
+
+class WeaponIndex:
+    """武器别名索引
+
+    预先建立别名精确匹配、角色专武和武器名字符倒排索引，
+    部分名称查询只需检查包含全部字符的武器
+    """
+
+    SIGNATURE_SUFFIX = "专武"
+
+    def __init__(self, groups: dict[str, list[str]], char_index: AliasIndex):
+        """初始化
+
+        参数:
+            groups: 武器名到别名列表的映射
+            char_index: 角色别名索引，用于解析专武别名中的角色名
+        """
+        self.char_index = char_index
+        self.names: list[str] = list(groups)
+        """按文件顺序排列的武器名"""
+        self.exact: dict[str, int] = {}
+        """别名到武器位置"""
+        self.signature: dict[str, str] = {}
+        """角色名到专武名"""
+        self._postings: dict[str, set[int]] = {}
+        for pos, (canonical, aliases) in enumerate(groups.items()):
+            for char in canonical:
+                self._postings.setdefault(char, set()).add(pos)
+            for alias in aliases:
+                self.exact.setdefault(alias, pos)
+                if alias.endswith(self.SIGNATURE_SUFFIX):
+                    char_name = alias.removesuffix(self.SIGNATURE_SUFFIX)
+                    self.signature.setdefault(char_name, canonical)
+                    if char_canonical := char_index.get(char_name):
+                        self.signature.setdefault(char_canonical, canonical)
+
+    def _substring(self, name: str) -> int | None:
+        """查找名称包含该字符串的第一个武器
+
+        参数:
+            name: 部分武器名
+
+        返回:
+            int | None: 武器位置
+        """
+        postings = [self._postings.get(char) for char in set(name)]
+        if not name or not all(postings):
+            return None
+        postings.sort(key=len)
+        candidates = set.intersection(*postings)  # type: ignore
+        return next(
+            (pos for pos in sorted(candidates) if name in self.names[pos]), None
+        )
+
+    def _match(self, name: str) -> str | None:
+        """按别名或部分武器名匹配，多个结果时取文件中靠前的武器
+
+        参数:
+            name: 武器名或别名
+
+        返回:
+            str | None: 武器名
+        """
+        matched = [
+            pos
+            for pos in (self.exact.get(name), self._substring(name))
+            if pos is not None
+        ]
+        return self.names[min(matched)] if matched else None
+
+    def get_signature(self, char_name: str) -> str | None:
+        """获取角色专武
+
+        参数:
+            char_name: 角色名或别名
+
+        返回:
+            str | None: 专武名
+        """
+        canonical = self.char_index.get(char_name) or char_name
+        return (
+            self.signature.get(canonical)
+            or self.signature.get(char_name)
+            or self._match(f"{canonical}{self.SIGNATURE_SUFFIX}")
+        )
+
+    def get(self, name: str) -> str | None:
+        """获取武器名
+
+        参数:
+            name: 武器名、别名或 "角色名专武"
+
+        返回:
+            str | None: 武器名
+        """
+        if weapon := self._match(name):
+            return weapon
+        if self.SIGNATURE_SUFFIX in name:
+            return self.get_signature(name.replace(self.SIGNATURE_SUFFIX, ""))
+        return None
@@ -1,9 +1,11 @@
-from typing import ClassVar
+import asyncio
+from pathlib import Path
+import time
+from typing import Any, ClassVar
 
 import ujson as json
 
 from zhenxun.services.log import logger
-from zhenxun.utils.utils import cn2py
 
 from ...config import LOG_COMMAND
 from ...paths import (
@@ -13,33 +15,131 @@ from ...paths import (
     SOUND_ALIAS_FILE,
     WEAPON_ALIAS_FILE,
 )
+from .alias_index import AliasIndex, WeaponIndex
+
+DATA_FILES: dict[str, tuple[Path, str]] = {
+    "char_alias": (CHAR_ALIAS_FILE, "角色别名"),
+    "echo_alias": (ECHO_ALIAS_FILE, "声骸别名"),
+    "sound_alias": (SOUND_ALIAS_FILE, "声骸套装别名"),
+    "weapon_alias": (WEAPON_ALIAS_FILE, "武器别名"),
+    "id2name": (ID2NAME_FILE, "ID到名称的映射"),
+}
+"""数据名称到文件路径和说明的映射"""
+
+
+class EntitySnapshot:
+    """一次加载得到的全部别名数据和索引
+
+    创建后不再修改，重新加载时整体替换
+    """
+
+    def __init__(self, data: dict[str, Any]):
+        """初始化
+
+        参数:
+            data: 数据名称到文件内容的映射，缺失的数据视为空
+        """
+        self.char_alias: dict[str, list[str]] = data.get("char_alias", {})
+        self.echo_alias: dict[str, list[str]] = data.get("echo_alias", {})
+        self.sound_alias: dict[str, list[str]] = data.get("sound_alias", {})
+        self.weapon_alias: dict[str, list[str]] = data.get("weapon_alias", {})
+        self.id2name: dict[str, str] = data.get("id2name", {})
+
+        self.char_index = AliasIndex(self.char_alias)
+        self.echo_index = AliasIndex(self.echo_alias)
+        self.sound_index = AliasIndex(self.sound_alias)
+        self.weapon_index = WeaponIndex(self.weapon_alias, self.char_index)
+        self.name2id: dict[str, int] = {}
+        for id, name in self.id2name.items():
+            self.name2id.setdefault(name, int(id))
 
 
 class EntityManager:
-    _char_alias: ClassVar[dict[str, list[str]]] = {}
-    _echo_alias: ClassVar[dict[str, list[str]]] = {}
-    _sound_alias: ClassVar[dict[str, list[str]]] = {}
-    _weapon_alias: ClassVar[dict[str, list[str]]] = {}
+    _data: ClassVar[EntitySnapshot] = EntitySnapshot({})
+    """当前数据，查询时只读取一次引用，重新加载时整体替换"""
+    _mtimes: ClassVar[dict[str, float]] = {}
+    _reload_lock: ClassVar[asyncio.Lock] = asyncio.Lock()
+    _loaded: ClassVar[bool] = False
 
-    _id2name: ClassVar[dict[str, str]] = {}
+    load_timings: ClassVar[dict[str, float]] = {}
+    """最近一次加载各文件及建立索引的耗时（毫秒）"""
+
+    @classmethod
+    def _get_mtimes(cls) -> dict[str, float]:
+        """获取各数据文件的修改时间
+
+        返回:
+            dict[str, float]: 数据名称到修改时间的映射，文件不存在时为0
+        """
+        return {
+            name: path.stat().st_mtime if path.exists() else 0
+            for name, (path, _) in DATA_FILES.items()
+        }
+
+    @classmethod
+    def _load_snapshot(cls) -> tuple[EntitySnapshot, dict[str, float]]:
+        """读取所有数据文件并建立索引
+
+        返回:
+            tuple[EntitySnapshot, dict[str, float]]: 数据和各步骤耗时（毫秒）
+        """
+        data: dict[str, Any] = {}
+        timings: dict[str, float] = {}
+        for name, (path, desc) in DATA_FILES.items():
+            start = time.perf_counter()
+            with open(path, encoding="utf-8") as f:
+                data[name] = json.load(f)
+            timings[name] = round((time.perf_counter() - start) * 1000, 2)
+            logger.info(f"加载{desc}: {path}", LOG_COMMAND)
+        start = time.perf_counter()
+        snapshot = EntitySnapshot(data)
+        timings["index"] = round((time.perf_counter() - start) * 1000, 2)
+        return snapshot, timings
 
     @classmethod
     def load_data(cls):
-        with open(CHAR_ALIAS_FILE, encoding="utf-8") as f:
-            cls._char_alias = json.load(f)
-            logger.info(f"加载角色别名: {CHAR_ALIAS_FILE}", LOG_COMMAND)
-        with open(ECHO_ALIAS_FILE, encoding="utf-8") as f:
-            cls._echo_alias = json.load(f)
-            logger.info(f"加载声骸别名: {ECHO_ALIAS_FILE}", LOG_COMMAND)
-        with open(SOUND_ALIAS_FILE, encoding="utf-8") as f:
-            cls._sound_alias = json.load(f)
-            logger.info(f"加载声骸套装别名: {SOUND_ALIAS_FILE}", LOG_COMMAND)
-        with open(WEAPON_ALIAS_FILE, encoding="utf-8") as f:
-            cls._weapon_alias = json.load(f)
-            logger.info(f"加载武器别名: {WEAPON_ALIAS_FILE}", LOG_COMMAND)
-        with open(ID2NAME_FILE, encoding="utf-8") as f:
-            cls._id2name = json.load(f)
-            logger.info(f"加载ID到名称的映射: {ID2NAME_FILE}", LOG_COMMAND)
+        """同步加载所有数据"""
+        mtimes = cls._get_mtimes()
+        cls._data, cls.load_timings = cls._load_snapshot()
+        cls._mtimes = mtimes
+        cls._loaded = True
+
+    @classmethod
+    def _get_data(cls) -> EntitySnapshot:
+        """获取当前数据，启动任务尚未加载时在首次使用时同步加载
+
+        返回:
+            EntitySnapshot: 当前数据
+        """
+        if not cls._loaded:
+            cls.load_data()
+        return cls._data
+
+    @classmethod
+    async def reload(cls, force: bool = False) -> bool:
+        """数据文件有修改时在线程中重新加载并替换
+
+        加载期间查询继续使用旧数据，加载失败时保留旧数据
+
+        参数:
+            force: 是否忽略修改时间强制重新加载
+
+        返回:
+            bool: 是否重新加载
+        """
+        async with cls._reload_lock:
+            mtimes = cls._get_mtimes()
+            if not force and mtimes == cls._mtimes:
+                return False
+            try:
+                snapshot, timings = await asyncio.to_thread(cls._load_snapshot)
+            except Exception as e:
+                logger.error("重新加载别名数据失败", LOG_COMMAND, e=e)
+                return False
+            cls._data, cls.load_timings, cls._mtimes = snapshot, timings, mtimes
+            cls._loaded = True
+            logger.info(f"重新加载别名数据完成，耗时(ms): {timings}", LOG_COMMAND)
+            return True
 
     @classmethod
     def get_weapon_alias(cls, weapon_name: str) -> str:
@@ -51,20 +151,34 @@ class EntityManager:
         返回:
             str: 武器别名
         """
-        for i in cls._weapon_alias:
-            if (weapon_name in i) or (weapon_name in cls._weapon_alias[i]):
-                return i
+        return cls._get_data().weapon_index.get(weapon_name) or weapon_name
+
+    @classmethod
+    def get_signature_weapon(cls, char_name: str) -> str | None:
+        """获取角色专武
+
+        参数:
+            char_name: 角色名
+
+        返回:
+            str | None: 专武名
+        """
+        return cls._get_data().weapon_index.get_signature(char_name)
 
-        if "专武" in weapon_name:
-            char_name = weapon_name.replace("专武", "")
-            name = cls.get_char_alias(char_name)
-            weapon_name = f"{name}专武"
+    @classmethod
+    def get_weapon_id(cls, weapon_name: str) -> int | None:
+        """获取武器ID
 
-        for i in cls._weapon_alias:
-            if (weapon_name in i) or (weapon_name in cls._weapon_alias[i]):
-                return i
+        参数:
+            weapon_name: 武器名或别名
 
-        return weapon_name
+        返回:
+            int | None: 武器ID
+        """
+        data = cls._get_data()
+        if weapon := data.weapon_index.get(weapon_name):
+            return data.name2id.get(weapon)
+        return None
 
     @classmethod
     def id_to_name(cls, id: int | str) -> str | None:
@@ -76,58 +190,46 @@ class EntityManager:
         返回:
             str | None: 单位名称
         """
-        return cls._id2name.get(str(id))
+        return cls._get_data().id2name.get(str(id))
 
     @classmethod
-    def get_char_alias(cls, name: str) -> str | None:
+    def get_char_alias(cls, name: str, fuzzy: bool = False) -> str | None:
         """获取角色别名
 
         参数:
             name: 角色名
+            fuzzy: 精确匹配失败时是否按前缀模糊匹配
 
         返回:
             str | None: 别名
         """
-        for alias, aliases in cls._char_alias.items():
-            if name in aliases:
-                return alias
-            if cn2py(name) == cn2py(alias):
-                return alias
-        return None
+        return cls._get_data().char_index.get(name, fuzzy)
 
     @classmethod
-    def get_echo_alias(cls, name: str) -> str | None:
+    def get_echo_alias(cls, name: str, fuzzy: bool = False) -> str | None:
         """获取声骸别名
 
         参数:
             name: 声骸名
+            fuzzy: 精确匹配失败时是否按前缀模糊匹配
 
         返回:
             str | None: 别名
         """
-        for alias, aliases in cls._echo_alias.items():
-            if name in aliases:
-                return alias
-            if cn2py(name) == cn2py(alias):
-                return alias
-        return None
+        return cls._get_data().echo_index.get(name, fuzzy)
 
     @classmethod
-    def get_sound_alias(cls, name: str) -> str | None:
+    def get_sound_alias(cls, name: str, fuzzy: bool = False) -> str | None:
         """获取声骸别名
 
         参数:
             name: 声骸名
+            fuzzy: 精确匹配失败时是否按前缀模糊匹配
 
         返回:
             str | None: 别名
         """
-        for alias, aliases in cls._sound_alias.items():
-            if name in aliases:
-                return alias
-            if cn2py(name) == cn2py(alias):
-                return alias
-        return None
+        return cls._get_data().sound_index.get(name, fuzzy)
 
     @classmethod
     def name_to_id(cls, name: str) -> int | None:
@@ -139,12 +241,8 @@ class EntityManager:
         返回:
             int | None: 角色ID
         """
-        if alias := cls.get_char_alias(name):
-            return next(
-                (int(id) for id, name in cls._id2name.items() if name == alias), None
-            )
-        else:
-            return None
-
+        data = cls._get_data()
+        if alias := data.char_index.get(name):
+            return data.name2id.get(alias)
+        return None
 
-EntityManager.load_data()
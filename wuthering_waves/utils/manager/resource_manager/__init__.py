@@ -1,148 +1,277 @@
-import os
-from pathlib import Path
+import asyncio
+from datetime import datetime
+import time
+from typing import Any, ClassVar
 
-import aiofiles
+from tortoise.transactions import in_transaction
+import ujson as json
 
-from zhenxun.builtin_plugins.wuthering_waves.paths import EMOJI_PATH
+from zhenxun.builtin_plugins.wuthering_waves.paths import DATA_PATH
 from zhenxun.services.log import logger
 from zhenxun.utils.http_utils import AsyncHttpx
 
 from ....base_models import WwBaseResponse
-from ....config import LOG_COMMAND
+from ....config import LOG_COMMAND, config
 from ....models.emoji import EmojiItem, EmojiPackage
+from .downloader import EmojiDownloader
 from .models import EmojiPackage as EmojiPackageModel
 
 
 class WsResourceManager:
     EMOJI_URL = "https://api.kurobbs.com/user/emoji/queryAll"
 
+    PACKAGE_FIELDS = (
+        "title",
+        "creat_time",
+        "active_time",
+        "update_time",
+        "main_img_url",
+        "state_code",
+        "timing_active",
+        "package_size",
+        "state",
+    )
+    """表情包同步时对比的字段"""
+    EMOJI_FIELDS = ("img_url", "img_size", "name", "package_id")
+    """表情同步时对比的字段"""
+    SYNC_STATE_FILE = DATA_PATH / "emoji_sync.json"
+    """表情目录上次同步时间"""
+
+    _sync_task: ClassVar[asyncio.Task | None] = None
+    _sync_status: ClassVar[dict[str, Any]] = {
+        "state": "idle",
+        "last_sync": None,
+        "elapsed": None,
+        "error": None,
+    }
+
+    @classmethod
+    def _get_last_sync(cls) -> float | None:
+        """读取表情目录上次同步时间
+
+        返回:
+            float | None: 时间戳，从未同步时为None
+        """
+        try:
+            data = json.loads(cls.SYNC_STATE_FILE.read_text(encoding="utf8"))
+            return data["last_sync"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    @classmethod
+    def _set_last_sync(cls, timestamp: float):
+        """保存表情目录同步时间
+
+        参数:
+            timestamp: 时间戳
+        """
+        cls.SYNC_STATE_FILE.write_text(
+            json.dumps({"last_sync": timestamp}), encoding="utf8"
+        )
+        cls._sync_status["last_sync"] = timestamp
+
     @classmethod
-    async def download_emoji_resources(cls):
-        logger.info("开始下载获取鸣潮表情资源...", LOG_COMMAND)
-        await cls.call_emoji_resources()
+    def is_catalogue_fresh(cls) -> bool:
+        """表情目录是否在同步间隔内已同步
+
+        返回:
+            bool: 是否无需同步
+        """
+        last_sync = cls._get_last_sync()
+        return (
+            last_sync is not None
+            and time.time() - last_sync < config.emoji.sync_interval
+        )
+
+    @classmethod
+    async def download_emoji_resources(cls, force: bool = False):
+        """同步表情目录并下载未下载的表情
+
+        参数:
+            force: 是否忽略同步间隔强制同步目录
+        """
+        if force or not cls.is_catalogue_fresh():
+            logger.info("开始下载获取鸣潮表情资源...", LOG_COMMAND)
+            await cls.call_emoji_resources()
+            cls._set_last_sync(time.time())
+        else:
+            logger.debug("鸣潮表情目录在同步间隔内，跳过同步", LOG_COMMAND)
         logger.info("开始下载鸣潮表情资源...", LOG_COMMAND)
         await cls.download_emojis()
         logger.info("鸣潮表情资源下载完成", LOG_COMMAND)
 
+    @classmethod
+    async def _run_sync(cls, force: bool):
+        """后台同步任务，记录执行状态
+
+        参数:
+            force: 是否忽略同步间隔强制同步目录
+        """
+        cls._sync_status.update(state="running", error=None)
+        start = time.perf_counter()
+        try:
+            await cls.download_emoji_resources(force)
+        except asyncio.CancelledError:
+            cls._sync_status["state"] = "cancelled"
+            raise
+        except Exception as e:
+            cls._sync_status.update(state="failed", error=str(e))
+            logger.error("鸣潮表情资源同步失败", LOG_COMMAND, e=e)
+        else:
+            cls._sync_status["state"] = "done"
+        finally:
+            cls._sync_status["elapsed"] = round(time.perf_counter() - start, 2)
+
+    @classmethod
+    def start_sync(cls, force: bool = False) -> bool:
+        """在后台开始同步表情资源，不阻塞启动
+
+        参数:
+            force: 是否忽略同步间隔强制同步目录
+
+        返回:
+            bool: 是否启动了新的同步任务，已有任务运行时为False
+        """
+        if cls._sync_task is not None and not cls._sync_task.done():
+            return False
+        cls._sync_task = asyncio.create_task(cls._run_sync(force))
+        return True
+
+    @classmethod
+    async def stop_sync(cls):
+        """取消正在运行的同步任务"""
+        task, cls._sync_task = cls._sync_task, None
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    @classmethod
+    def sync_status(cls) -> dict[str, Any]:
+        """同步状态
+
+        返回:
+            dict[str, Any]: 状态（idle/running/done/failed/cancelled）、
+                上次目录同步时间、上次执行耗时（秒）和错误信息
+        """
+        if cls._sync_status["last_sync"] is None:
+            cls._sync_status["last_sync"] = cls._get_last_sync()
+        return dict(cls._sync_status)
+
+    @classmethod
+    def _same(cls, old: Any, new: Any) -> bool:
+        """字段值是否相同，时间按时间戳对比，忽略数据库返回的时区差异
+
+        参数:
+            old: 数据库中的值
+            new: 远端的值
+
+        返回:
+            bool: 是否相同
+        """
+        if isinstance(old, datetime) and isinstance(new, datetime):
+            return old.timestamp() == new.timestamp()
+        return old == new
+
+    @classmethod
+    def _update_fields(
+        cls, obj: EmojiItem | EmojiPackage, values: dict[str, Any]
+    ) -> bool:
+        """将远端字段值写入数据库数据
+
+        参数:
+            obj: 数据库数据
+            values: 远端字段值
+
+        返回:
+            bool: 是否有字段发生变化
+        """
+        if all(cls._same(getattr(obj, f), v) for f, v in values.items()):
+            return False
+        for f, v in values.items():
+            setattr(obj, f, v)
+        return True
+
     @classmethod
     async def call_emoji_resources(cls):
-        """下载表情资源并存储到数据库"""
+        """下载表情资源并存储到数据库
+
+        在内存中对比数据库快照，只写入新增和发生变化的数据，
+        创建和更新各使用一条批量语句
+        """
         response = await AsyncHttpx.post(cls.EMOJI_URL)
         response.raise_for_status()
 
         ww_response = WwBaseResponse(**response.json())
         emoji_packages = [EmojiPackageModel(**v) for v in ww_response.data]
 
-        # 批量获取已存在的package_id和emoji_id
-        existing_packages = await EmojiPackage.all().values_list(
-            "package_id", flat=True
-        )
-        existing_emojis = await EmojiItem.all().values_list("emoji_id", flat=True)
-
-        existing_packages_set = set(existing_packages)
-        existing_emojis_set = set(existing_emojis)
+        # 批量获取已存在的表情包和表情
+        existing_packages = {p.package_id: p for p in await EmojiPackage.all()}
+        existing_emojis = {e.emoji_id: e for e in await EmojiItem.all()}
 
-        # 存储表情包数据
+        new_packages: list[EmojiPackage] = []
+        changed_packages: dict[str, EmojiPackage] = {}
+        new_emojis: list[EmojiItem] = []
+        changed_emojis: dict[str, EmojiItem] = {}
         for package_data in emoji_packages:
             if "战双" in package_data.title:
                 continue
+            values = {f: getattr(package_data, f) for f in cls.PACKAGE_FIELDS}
+            if (package := existing_packages.get(package_data.id)) is None:
+                package = EmojiPackage(package_id=package_data.id, **values)
+                existing_packages[package_data.id] = package
+                new_packages.append(package)
+            elif cls._update_fields(package, values):
+                changed_packages[package_data.id] = package
 
-            if package_data.id in existing_packages_set:
-                # 更新现有表情包
-                package = await EmojiPackage.get(package_id=package_data.id)
-                await package.update_from_dict(
-                    {
-                        "title": package_data.title,
-                        "creat_time": package_data.creat_time,
-                        "active_time": package_data.active_time,
-                        "update_time": package_data.update_time,
-                        "main_img_url": package_data.main_img_url,
-                        "state_code": package_data.state_code,
-                        "timing_active": package_data.timing_active,
-                        "package_size": package_data.package_size,
-                        "state": package_data.state,
-                    }
-                )
-            else:
-                # 创建新表情包
-                package = await EmojiPackage.create(
-                    package_id=package_data.id,
-                    title=package_data.title,
-                    creat_time=package_data.creat_time,
-                    active_time=package_data.active_time,
-                    update_time=package_data.update_time,
-                    main_img_url=package_data.main_img_url,
-                    state_code=package_data.state_code,
-                    timing_active=package_data.timing_active,
-                    package_size=package_data.package_size,
-                    state=package_data.state,
-                )
-
-            # 存储表情项数据
             for emoji_data in package_data.emoji_list:
-                if emoji_data.id in existing_emojis_set:
-                    # 更新现有表情项
-                    emoji = await EmojiItem.get(emoji_id=emoji_data.id)
-                    await emoji.update_from_dict(
-                        {
-                            "img_url": emoji_data.img_url,
-                            "img_size": emoji_data.img_size,
-                            "name": emoji_data.name,
-                            "package_id": emoji_data.package_id,
-                        }
-                    )
-                else:
-                    # 创建新表情项
-                    await EmojiItem.create(
+                values = {f: getattr(emoji_data, f) for f in cls.EMOJI_FIELDS}
+                if (emoji := existing_emojis.get(emoji_data.id)) is None:
+                    emoji = EmojiItem(
                         emoji_id=emoji_data.id,
-                        img_url=emoji_data.img_url,
-                        img_size=emoji_data.img_size,
-                        name=emoji_data.name,
-                        package_id=emoji_data.package_id,
                         is_downloaded=False,
                         path="",  # 初始为空，下载后设置
+                        **values,
                     )
+                    existing_emojis[emoji_data.id] = emoji
+                    new_emojis.append(emoji)
+                elif cls._update_fields(emoji, values):
+                    changed_emojis[emoji_data.id] = emoji
 
+        async with in_transaction() as conn:
+            if new_packages:
+                await EmojiPackage.bulk_create(new_packages, using_db=conn)
+            if changed_packages:
+                await EmojiPackage.bulk_update(
+                    list(changed_packages.values()),
+                    fields=list(cls.PACKAGE_FIELDS),
+                    using_db=conn,
+                )
+            if new_emojis:
+                await EmojiItem.bulk_create(new_emojis, using_db=conn)
+            if changed_emojis:
+                await EmojiItem.bulk_update(
+                    list(changed_emojis.values()),
+                    fields=list(cls.EMOJI_FIELDS),
+                    using_db=conn,
+                )
+        logger.info(
+            f"表情资源同步完成: 新增表情包 {len(new_packages)}，"
+            f"更新表情包 {len(changed_packages)}，新增表情 {len(new_emojis)}，"
+            f"更新表情 {len(changed_emojis)}",
+            LOG_COMMAND,
+        )
         return len(emoji_packages)
 
     @classmethod
     async def download_emojis(cls):
-        """下载所有未下载的表情"""
-        # 获取所有未下载的表情
+        """并发下载所有未下载的表情"""
         undownloaded_emojis = await EmojiItem.filter(is_downloaded=False).all()
-
-        for emoji in undownloaded_emojis:
-            try:
-                # 根据packageId创建文件夹
-                package_folder = EMOJI_PATH / emoji.package_id
-                package_folder.mkdir(parents=True, exist_ok=True)
-
-                # 生成文件名（使用emoji_id和原始扩展名）
-                file_extension = Path(emoji.img_url).suffix or ".gif"
-                filename = f"{emoji.emoji_id}{file_extension}"
-                file_path = package_folder / filename
-
-                if file_path.exists():
-                    continue
-
-                # 下载表情图片
-                response = await AsyncHttpx.get(emoji.img_url)
-                response.raise_for_status()
-
-                # 保存文件
-                async with aiofiles.open(file_path, "wb") as f:
-                    await f.write(response.content)
-
-                # 更新数据库记录
-                await emoji.update_from_dict(
-                    {"is_downloaded": True, "path": str(file_path)}
-                )
-
-                logger.debug(f"成功下载表情: {emoji.name} -> {file_path}", LOG_COMMAND)
-
-            except Exception as e:
-                logger.warning(
-                    f"下载表情失败 {emoji.name} ({emoji.emoji_id})", LOG_COMMAND, e=e
-                )
-
+        downloader = EmojiDownloader()
+        await downloader.run(undownloaded_emojis)
+        if downloader.failed:
+            logger.warning(f"{downloader.failed} 个表情下载失败", LOG_COMMAND)
         return len(undownloaded_emojis)
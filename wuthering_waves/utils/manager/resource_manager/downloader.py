@@ -0,0 +1,211 @@
+import asyncio
+import contextlib
+import os
+from pathlib import Path
+import time
+
+import aiofiles
+
+from zhenxun.builtin_plugins.wuthering_waves.paths import EMOJI_PATH
+from zhenxun.services.log import logger
+
+from ....config import LOG_COMMAND, config
+from ....models.emoji import EmojiItem
+from ....waves_api.client import WavesHttpClient
+
+
+class EmojiSizeMismatch(Exception):
+    """下载的表情大小与记录不一致"""
+
+
+class EmojiDownloader:
+    """表情并发下载
+
+    固定数量的协程从队列中取出表情下载，响应体按块写入临时文件，
+    校验大小后原子重命名，下载状态按批量写入数据库
+    """
+
+    RETRY_BACKOFF = 0.5
+    """首次重试等待时间（秒），之后每次翻倍"""
+
+    def __init__(
+        self,
+        concurrency: int | None = None,
+        retries: int | None = None,
+        batch_size: int | None = None,
+    ):
+        """初始化
+
+        参数:
+            concurrency: 并发数，为None时使用配置
+            retries: 重试次数，为None时使用配置
+            batch_size: 批量写入数量，为None时使用配置
+        """
+        emoji_config = config.emoji
+        self.concurrency = max(concurrency or emoji_config.download_concurrency, 1)
+        self.retries = max(
+            emoji_config.download_retries if retries is None else retries, 0
+        )
+        self.batch_size = max(batch_size or emoji_config.download_batch_size, 1)
+        self.total = 0
+        """待下载数量"""
+        self.downloaded = 0
+        """下载成功数量，包含本地已存在的文件"""
+        self.failed = 0
+        """下载失败数量"""
+        self.bytes = 0
+        """下载字节数"""
+        self._pending: list[EmojiItem] = []
+        self._start = 0.0
+
+    @staticmethod
+    def get_path(emoji: EmojiItem) -> Path:
+        """表情本地路径，按packageId分文件夹，使用emoji_id和原始扩展名命名
+
+        参数:
+            emoji: 表情
+
+        返回:
+            Path: 本地路径
+        """
+        file_extension = Path(emoji.img_url).suffix or ".gif"
+        return EMOJI_PATH / emoji.package_id / f"{emoji.emoji_id}{file_extension}"
+
+    @staticmethod
+    def _expected_size(emoji: EmojiItem) -> int | None:
+        """记录中的文件大小
+
+        参数:
+            emoji: 表情
+
+        返回:
+            int | None: 文件大小（字节），无法解析时为None
+        """
+        size = str(emoji.img_size).strip()
+        return int(size) if size.isdigit() else None
+
+    async def _fetch(self, emoji: EmojiItem, file_path: Path) -> int:
+        """下载到临时文件后重命名
+
+        参数:
+            emoji: 表情
+            file_path: 本地路径
+
+        返回:
+            int: 文件大小（字节）
+
+        异常:
+            EmojiSizeMismatch: 文件大小与记录不一致
+        """
+        tmp_path = file_path.with_name(f"{file_path.name}.part")
+        size = 0
+        try:
+            async with WavesHttpClient.stream("GET", emoji.img_url) as response:
+                response.raise_for_status()
+                async with aiofiles.open(tmp_path, "wb") as f:
+                    async for chunk in response.aiter_bytes():
+                        await f.write(chunk)
+                        size += len(chunk)
+            expected = self._expected_size(emoji)
+            if expected is not None and size != expected:
+                raise EmojiSizeMismatch(f"文件大小 {size} 与记录 {expected} 不一致")
+            os.replace(tmp_path, file_path)
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                tmp_path.unlink()
+        return size
+
+    async def _download(self, emoji: EmojiItem) -> bool:
+        """下载单个表情，失败时按指数退避重试
+
+        参数:
+            emoji: 表情
+
+        返回:
+            bool: 是否成功
+        """
+        file_path = self.get_path(emoji)
+        expected = self._expected_size(emoji)
+        if file_path.exists() and (
+            expected is None or file_path.stat().st_size == expected
+        ):
+            return True
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        for attempt in range(self.retries + 1):
+            try:
+                self.bytes += await self._fetch(emoji, file_path)
+                logger.debug(f"成功下载表情: {emoji.name} -> {file_path}", LOG_COMMAND)
+                return True
+            except Exception as e:
+                if attempt >= self.retries:
+                    logger.warning(
+                        f"下载表情失败 {emoji.name} ({emoji.emoji_id})",
+                        LOG_COMMAND,
+                        e=e,
+                    )
+                    return False
+                await asyncio.sleep(self.RETRY_BACKOFF * 2**attempt)
+        return False
+
+    async def _flush(self):
+        """将已下载的表情状态批量写入数据库"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        await EmojiItem.bulk_update(pending, fields=["is_downloaded", "path"])
+        elapsed = max(time.perf_counter() - self._start, 1e-6)
+        logger.info(
+            f"表情下载进度: {self.downloaded + self.failed}/{self.total}，"
+            f"失败 {self.failed}，{self.downloaded / elapsed:.1f} 个/秒，"
+            f"{self.bytes / 1024 / 1024 / elapsed:.2f} MB/秒",
+            LOG_COMMAND,
+        )
+
+    async def _worker(self, queue: asyncio.Queue[EmojiItem]):
+        """下载协程
+
+        参数:
+            queue: 待下载队列
+        """
+        while True:
+            try:
+                emoji = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if await self._download(emoji):
+                self.downloaded += 1
+                emoji.is_downloaded = True
+                emoji.path = str(self.get_path(emoji))
+                self._pending.append(emoji)
+                if len(self._pending) >= self.batch_size:
+                    await self._flush()
+            else:
+                self.failed += 1
+
+    async def run(self, emojis: list[EmojiItem]) -> int:
+        """下载表情
+
+        参数:
+            emojis: 待下载的表情
+
+        返回:
+            int: 下载成功数量
+        """
+        self.total = len(emojis)
+        if not emojis:
+            return 0
+        self._start = time.perf_counter()
+        queue: asyncio.Queue[EmojiItem] = asyncio.Queue()
+        for emoji in emojis:
+            queue.put_nowait(emoji)
+        try:
+            await asyncio.gather(
+                *(
+                    self._worker(queue)
+                    for _ in range(min(self.concurrency, len(emojis)))
+                )
+            )
+        finally:
+            # 中途取消时也保存已完成的下载状态
+            await asyncio.shield(self._flush())
+        return self.downloaded
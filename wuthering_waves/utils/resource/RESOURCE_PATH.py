@@ -62,7 +62,13 @@ CUSTOM_WEAPON_ALIAS_PATH = ALIAS_PATH / "weapon_alias.json"
 CUSTOM_ECHO_ALIAS_PATH = ALIAS_PATH / "echo_alias.json"
 
 
+_dir_initialized = False
+
+
 def init_dir():
+    global _dir_initialized
+    if _dir_initialized:
+        return
     for i in [
         MAIN_PATH,
         PLAYER_PATH,
@@ -91,10 +97,9 @@ def init_dir():
         CUSTOM_MR_CARD_PATH,
     ]:
         i.mkdir(parents=True, exist_ok=True)
+    _dir_initialized = True
 
 
-init_dir()
-
 # 设置 Jinja2 环境
 TEMP_PATH = Path(__file__).parents[1].parent / "templates"
 waves_templates = Environment(
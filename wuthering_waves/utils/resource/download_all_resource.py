@@ -15,10 +15,12 @@ from .RESOURCE_PATH import (
     WUHEN_GUIDE_PATH,
     XIAOYANG_GUIDE_PATH,
     XMU_GUIDE_PATH,
+    init_dir,
 )
 
 
 async def download_all_resource():
+    init_dir()
     await download_all_file(
         "WutheringWavesUID",
         {
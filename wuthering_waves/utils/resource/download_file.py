@@ -1,9 +1,15 @@
+import contextlib
+import os
+from pathlib import Path
 from typing import Union
 
 from PIL import Image
 
 from gsuid_core.utils.download_resource.download_file import download
 
+from ...config import config
+from ..cache import TimedCache
+from ..singleflight import SingleFlight
 from .RESOURCE_PATH import (
     FETTER_PATH,
     MATERIAL_PATH,
@@ -12,6 +18,72 @@ from .RESOURCE_PATH import (
     ROLE_DETAIL_SKILL_PATH,
 )
 
+_image_cache = TimedCache(
+    timeout=float("inf"),
+    maxsize=10000,
+    name="decoded_images",
+    max_cost=config.image_cache_mb * 1024 * 1024,
+    cost_func=lambda image: image.width * image.height * len(image.getbands()),
+)
+"""已解码的RGBA图标，按像素数据字节数限制容量"""
+
+_download_flight = SingleFlight("asset_download")
+"""按文件路径合并同时进行的图标下载"""
+
+
+async def _download_atomic(url: str, path: Path):
+    """下载到临时文件后重命名，其他协程不会读到写了一半的文件
+
+    参数:
+        url: 下载地址
+        path: 保存路径
+    """
+    if path.exists():
+        return
+    tmp_name = f"{path.name}.{os.getpid()}.part"
+    tmp_path = path.with_name(tmp_name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        await download(url, path.parent, tmp_name, tag="[鸣潮]")
+        if tmp_path.exists():
+            os.replace(tmp_path, path)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            tmp_path.unlink()
+
+
+async def download_once(url: str, path: Path):
+    """下载缺失的图标，同一路径同时只下载一次，其他调用等待同一次下载
+
+    参数:
+        url: 下载地址
+        path: 保存路径
+    """
+    if not path.exists():
+        await _download_flight.do(str(path), _download_atomic, url, path)
+
+
+def open_rgba(path: Path) -> Image.Image:
+    """打开图片并转换为RGBA，已解码的图片按路径和修改时间缓存
+
+    返回的是缓存图片的副本，调用方可以直接修改
+
+    参数:
+        path: 图片路径
+
+    返回:
+        Image.Image: RGBA图片
+    """
+    if config.image_cache_mb <= 0:
+        return Image.open(path).convert("RGBA")
+    key = (str(path), path.stat().st_mtime_ns)
+    image = _image_cache.get(key)
+    if image is None:
+        with Image.open(path) as raw:
+            image = raw.convert("RGBA")
+        _image_cache.set(key, image)
+    return image.copy()
+
 
 async def get_skill_img(
     char_id: Union[str, int], skill_name: str, pic_url: str
@@ -23,9 +95,9 @@ async def get_skill_img(
     name = f"skill_{skill_name}.png"
     _path = _dir / name
     if not _path.exists():
-        await download(pic_url, _dir, name, tag="[鸣潮]")
+        await download_once(pic_url, _path)
 
-    return Image.open(_path).convert("RGBA")
+    return open_rgba(_path)
 
 
 async def get_chain_img(
@@ -37,9 +109,9 @@ async def get_chain_img(
     name = f"chain_{order_id}.png"
     _path = _dir / name
     if not _path.exists():
-        await download(pic_url, _dir, name, tag="[鸣潮]")
+        await download_once(pic_url, _path)
 
-    return Image.open(_path).convert("RGBA")
+    return open_rgba(_path)
 
 
 async def get_phantom_img(phantom_id: int, pic_url: str) -> Image.Image:
@@ -47,23 +119,23 @@ async def get_phantom_img(phantom_id: int, pic_url: str) -> Image.Image:
     _path = PHANTOM_PATH / name
     if not _path.exists():
         if pic_url:
-            await download(pic_url, PHANTOM_PATH, name, tag="[鸣潮]")
+            await download_once(pic_url, _path)
         else:
             _path = PHANTOM_PATH / "phantom_390070051.png"
 
-    return Image.open(_path).convert("RGBA")
+    return open_rgba(_path)
 
 
 async def get_fetter_img(name: str, pic_url: str) -> Image.Image:
     name = f"fetter_{name}.png"
     _path = FETTER_PATH / name
     if not _path.exists():
-        await download(pic_url, FETTER_PATH, name, tag="[鸣潮]")
+        await download_once(pic_url, _path)
 
-    return Image.open(_path).convert("RGBA")
+    return open_rgba(_path)
 
 
 async def get_material_img(material_id: Union[str, int]) -> Image.Image:
     name = f"material_{material_id}.png"
     _path = MATERIAL_PATH / name
-    return Image.open(_path).convert("RGBA")
+    return open_rgba(_path)
@@ -0,0 +1,110 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+import copy
+from typing import Any, ClassVar, TypeVar
+
+T = TypeVar("T")
+
+
+class LeaderCancelled(Exception):
+    """发起调用的协程被取消，等待者需要重新发起调用"""
+
+
+class SingleFlight:
+    """合并相同的并发请求
+
+    同一个 key 在请求未完成期间再次调用时不会重复执行，
+    而是等待第一个调用的结果，每个等待者拿到的是结果的独立副本，
+    避免调用方修改返回值时互相影响
+    """
+
+    _registry: ClassVar[dict[str, "SingleFlight"]] = {}
+
+    def __init__(self, name: str):
+        """初始化
+
+        参数:
+            name: 名称
+        """
+        self.name = name
+        self._futures: dict[Hashable, asyncio.Future] = {}
+        self._waiters: dict[Hashable, int] = {}
+        self.calls = 0
+        """总调用次数"""
+        self.coalesced = 0
+        """被合并的调用次数"""
+        self._registry[name] = self
+
+    async def do(
+        self, key: Hashable, func: Callable[..., Awaitable[T]], *args, **kwargs
+    ) -> T:
+        """执行或等待同key的调用
+
+        参数:
+            key: 合并键
+            func: 异步函数
+            *args: 函数参数
+            **kwargs: 函数关键字参数
+
+        返回:
+            T: 函数结果
+        """
+        self.calls += 1
+        while future := self._futures.get(key):
+            self.coalesced += 1
+            self._waiters[key] = self._waiters.get(key, 0) + 1
+            try:
+                return copy.deepcopy(await asyncio.shield(future))
+            except LeaderCancelled:
+                # 发起调用的协程被取消，由等待者重新发起调用
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._futures[key] = future
+        self._waiters[key] = 0
+        try:
+            result = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            if self._waiters.get(key):
+                future.set_exception(LeaderCancelled())
+            else:
+                future.cancel()
+            raise
+        except Exception as e:
+            if self._waiters.get(key):
+                future.set_exception(e)
+            else:
+                future.cancel()
+            raise
+        else:
+            if self._waiters.get(key):
+                # 先生成副本，调用方拿到结果后可能会直接修改
+                future.set_result(copy.deepcopy(result))
+            else:
+                future.cancel()
+            return result
+        finally:
+            self._futures.pop(key, None)
+            self._waiters.pop(key, None)
+
+    def stats(self) -> dict[str, Any]:
+        """统计信息
+
+        返回:
+            dict[str, Any]: 调用次数、合并次数和进行中的请求数
+        """
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._futures),
+        }
+
+    @classmethod
+    def all_stats(cls) -> list[dict[str, Any]]:
+        """所有合并器的统计信息
+
+        返回:
+            list[dict[str, Any]]: 统计信息列表
+        """
+        return [flight.stats() for flight in cls._registry.values()]
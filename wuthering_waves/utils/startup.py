@@ -0,0 +1,75 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+import time
+from typing import ClassVar
+
+from zhenxun.services.log import logger
+
+from ..config import LOG_COMMAND
+
+
+class StartupTasks:
+    """插件启动任务
+
+    启动时不再同步执行的初始化工作登记在这里，
+    机器人启动后在后台依次执行并记录每一步的耗时
+    """
+
+    _tasks: ClassVar[list[tuple[str, Callable[[], Awaitable]]]] = []
+    _task: ClassVar[asyncio.Task | None] = None
+
+    timings: ClassVar[dict[str, float]] = {}
+    """各步骤耗时（毫秒）"""
+    errors: ClassVar[dict[str, str]] = {}
+    """执行失败的步骤和错误信息"""
+
+    @classmethod
+    def record(cls, name: str, elapsed: float):
+        """记录在其他地方完成的步骤耗时
+
+        参数:
+            name: 步骤名称
+            elapsed: 耗时（秒）
+        """
+        cls.timings[name] = round(elapsed * 1000, 2)
+
+    @classmethod
+    def register(cls, name: str, func: Callable[[], Awaitable]):
+        """登记启动任务
+
+        参数:
+            name: 步骤名称
+            func: 异步函数
+        """
+        cls._tasks.append((name, func))
+
+    @classmethod
+    async def _run(cls):
+        """依次执行启动任务，单个任务失败不影响后续任务"""
+        for name, func in cls._tasks:
+            start = time.perf_counter()
+            try:
+                await func()
+            except Exception as e:
+                cls.errors[name] = str(e)
+                logger.error(f"启动任务 {name} 执行失败", LOG_COMMAND, e=e)
+            cls.record(name, time.perf_counter() - start)
+        logger.info(f"启动任务完成: {cls.report()}", LOG_COMMAND)
+
+    @classmethod
+    def start(cls):
+        """在后台开始执行启动任务"""
+        if cls._task is None:
+            cls._task = asyncio.create_task(cls._run())
+
+    @classmethod
+    def report(cls) -> str:
+        """各步骤耗时报告
+
+        返回:
+            str: 报告文本
+        """
+        return ", ".join(
+            f"{name}: {elapsed}ms{' (失败)' if name in cls.errors else ''}"
+            for name, elapsed in cls.timings.items()
+        )
@@ -1,6 +1,6 @@
-from aiocache import cached
-
 from ..base_models import WwBaseResponse
+from ..utils.cache_backend import shared_cached
+from ..utils.singleflight import SingleFlight
 from .api.login import LoginApi
 from .api.login.models import LoginResult, RequestToken
 from .api.online import OnlineApi
@@ -11,6 +11,9 @@ from .api.role.models import CharDetailData, RoleDataContent, RoleInfo, RoleProg
 from .api.user import UserApi
 from .api.user.models import BaseUserData, RoleListData, TowerData
 
+online_flight = SingleFlight("online_list")
+"""已上线列表与cookie无关，并发请求只发出一次"""
+
 
 class WavesApi:
     @classmethod
@@ -172,7 +175,7 @@ class WavesApi:
         return await RoleApi.char_list(role_id, cookie, server_id)
 
     @classmethod
-    @cached(ttl=60 * 60 * 6)
+    @shared_cached("online_list_role", ttl=60 * 60 * 6, ignore=("cookie",))
     async def get_online_list_role(cls, cookie: str) -> WwBaseResponse[list[RoleItem]]:
         """获取已上线的角色
 
@@ -182,10 +185,12 @@ class WavesApi:
         返回:
             WwBaseResponse[bool]: 已上线的角色
         """
-        return await OnlineApi.get_online_list_role(cookie)
+        return await online_flight.do(
+            "role", OnlineApi.get_online_list_role, cookie
+        )
 
     @classmethod
-    @cached(ttl=60 * 60 * 6)
+    @shared_cached("online_list_weapon", ttl=60 * 60 * 6, ignore=("cookie",))
     async def get_online_list_weapon(
         cls, cookie: str
     ) -> WwBaseResponse[list[WeaponItem]]:
@@ -197,7 +202,9 @@ class WavesApi:
         返回:
             WwBaseResponse[list[WeaponItem]]: 已上线的武器
         """
-        return await OnlineApi.get_online_list_weapon(cookie)
+        return await online_flight.do(
+            "weapon", OnlineApi.get_online_list_weapon, cookie
+        )
 
     @classmethod
     async def calculator_refresh_data(
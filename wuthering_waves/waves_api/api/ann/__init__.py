@@ -2,15 +2,15 @@ import asyncio
 from typing import Any, ClassVar, cast
 
 from ....base_models import WwBaseResponse
-from ....utils.utils import TimedCache
+from ....utils.cache import TimedCache
 from ...const import ANN_CONTENT_URL, ANN_LIST_URL, GAME_ID
 from ...headers import get_headers
 from ..call import CallApi
 from .models import AnnDetailResponse, AnnList, AnnPaginationData
 
-cache = TimedCache(60 * 60 * 1)
+cache = TimedCache(60 * 60 * 1, name="ann_list", track_bytes=True)
 
-detail_cache = TimedCache(60 * 60 * 24)
+detail_cache = TimedCache(60 * 60 * 24, name="ann_detail", track_bytes=True)
 
 
 class AnnApi:
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Any
 
 from httpx import Response
@@ -6,18 +7,18 @@ import ujson as json
 
 from zhenxun.services.log import logger
 from zhenxun.utils.decorator.retry import Retry
-from zhenxun.utils.http_utils import AsyncHttpx
 
 from ...base_models import WwBaseResponse
 from ...config import LOG_COMMAND
 from ...exceptions import APICallException, APIResponseException
-from ...utils.utils import TimedCache
+from ...utils.singleflight import SingleFlight
 from ..api.login.models import (
     RequestToken,
 )
 from ..captcha import get_solver
-from ..captcha.base import CaptchaResult
+from ..captcha.base import CaptchaResult, CaptchaSolver
 from ..captcha.errors import CaptchaError
+from ..client import WavesHttpClient
 from ..const import (
     GAME_ID,
     NET_SERVER_ID_MAP,
@@ -32,8 +33,16 @@ from ..error_code import (
 )
 from ..headers import get_headers
 from ..models import CallResult
+from ..token_store import TokenStore
 
-_bat_cache = TimedCache(timeout=60 * 60 * 24 * 365)
+api_flight = SingleFlight("kuro_api")
+"""相同的库街区请求合并"""
+
+token_flight = SingleFlight("access_token")
+"""相同的access_token请求合并"""
+
+_refresh_tasks: dict[tuple[str, str], asyncio.Task] = {}
+"""后台刷新access_token的任务"""
 
 
 def login_platform() -> str:
@@ -45,8 +54,24 @@ def login_platform() -> str:
     return "ios"
 
 
-if captcha_solver := get_solver():
-    logger.info(f"验证码识别器初始化成功: {captcha_solver.get_name()}", LOG_COMMAND)
+_captcha_solver: CaptchaSolver | None = None
+_captcha_solver_loaded = False
+
+
+def get_captcha_solver() -> CaptchaSolver | None:
+    """获取验证码识别器，首次使用时才创建
+
+    返回:
+        CaptchaSolver | None: 验证码识别器，未配置时为None
+    """
+    global _captcha_solver, _captcha_solver_loaded
+    if not _captcha_solver_loaded:
+        _captcha_solver_loaded = True
+        if _captcha_solver := get_solver():
+            logger.info(
+                f"验证码识别器初始化成功: {_captcha_solver.get_name()}", LOG_COMMAND
+            )
+    return _captcha_solver
 
 
 def get_server_id(role_id: str) -> str:
@@ -59,7 +84,7 @@ async def solve_captcha(
     url: str, max_retries: int = 3
 ) -> CallResult | CaptchaResult | dict[str, Any]:
     """破解验证码"""
-    if not captcha_solver:
+    if not (captcha_solver := get_captcha_solver()):
         return CallResult(
             code=WAVES_CODE_999,
             data="验证码识别器未初始化",
@@ -130,21 +155,54 @@ class CallApi:
         }
 
     @classmethod
-    @Retry.api()
+    def __flight_key(cls, url: str, header: dict, kwargs: dict) -> tuple:
+        """生成请求合并键
+
+        参数:
+            url: 请求地址
+            header: 请求头
+            kwargs: 请求参数
+
+        返回:
+            tuple: 合并键，包含地址、登录凭证和规范化后的请求体
+        """
+        body = []
+        for name in ("data", "params", "json"):
+            value = kwargs.get(name)
+            if isinstance(value, dict):
+                value = tuple(sorted((str(k), str(v)) for k, v in value.items()))
+            elif value is not None:
+                value = str(value)
+            body.append(value)
+        return (url, header.get("token"), header.get("b-at"), *body)
+
+    @classmethod
     async def call_post(
         cls, url: str, header: dict | None = None, **kwargs
     ) -> WwBaseResponse:
-        """调用POST请求"""
+        """调用POST请求，相同的并发请求只会发出一次"""
         if not header:
             header = await get_headers()
-        if header:
-            header.pop("roleId", None)
-        response = await AsyncHttpx.post(url, headers=header, **kwargs)
+        return await api_flight.do(
+            cls.__flight_key(url, header, kwargs),
+            cls._call_post,
+            url,
+            header,
+            **kwargs,
+        )
+
+    @classmethod
+    @Retry.api()
+    async def _call_post(cls, url: str, header: dict, **kwargs) -> WwBaseResponse:
+        """调用POST请求"""
+        header = header.copy()
+        header.pop("roleId", None)
+        response = await WavesHttpClient.post(url, headers=header, **kwargs)
         response.raise_for_status()
         raw_data = cls.__format_data(response)
         data = raw_data.data
         if not raw_data.success and (
-            captcha_solver and isinstance(data, dict) and data.get("geeTest")
+            get_captcha_solver() and isinstance(data, dict) and data.get("geeTest")
         ):
             seccode_data = await solve_captcha(url)
             if isinstance(seccode_data, CaptchaResult):
@@ -176,8 +234,48 @@ async def get_access_token(
     返回:
         str: access_token
     """
-    if _bat_cache.get(role_id):
-        return str(_bat_cache.get(role_id))
+    if token := await TokenStore.get(role_id, cookie):
+        key = (role_id, cookie)
+        if key not in _refresh_tasks and TokenStore.needs_refresh(role_id, cookie):
+            # 先返回当前的access_token，在后台提前刷新，失败后间隔一段时间再试
+            TokenStore.mark_refresh_attempt(role_id, cookie)
+            task = asyncio.create_task(
+                _refresh_access_token(role_id, cookie, device_id, server_id)
+            )
+            _refresh_tasks[key] = task
+            task.add_done_callback(lambda _: _refresh_tasks.pop(key, None))
+        return token
+    return await token_flight.do(
+        (role_id, cookie),
+        _request_access_token,
+        role_id,
+        cookie,
+        device_id,
+        server_id,
+    )
+
+
+async def _refresh_access_token(
+    role_id: str, cookie: str, device_id: str, server_id: str | None = None
+):
+    """在后台刷新access_token，失败时继续使用原来的access_token"""
+    try:
+        await token_flight.do(
+            (role_id, cookie),
+            _request_access_token,
+            role_id,
+            cookie,
+            device_id,
+            server_id,
+        )
+    except Exception as e:
+        logger.warning(f"role_id: 【{role_id}】刷新access_token失败", LOG_COMMAND, e=e)
+
+
+async def _request_access_token(
+    role_id: str, cookie: str, device_id: str, server_id: str | None = None
+) -> str:
+    """请求access_token并写入缓存"""
     header = await get_headers(cookie, role_id=role_id)
     header.update({"token": cookie, "did": device_id, "b-at": ""})
     response = await CallApi.call_post(
@@ -196,5 +294,5 @@ async def get_access_token(
             response.code,
             response.msg or get_error_message(response.code),
         )
-    _bat_cache.set(role_id, response.data.access_token)
+    await TokenStore.set(role_id, cookie, response.data.access_token)
     return response.data.access_token
@@ -1,5 +1,6 @@
 from collections.abc import Callable
 from functools import wraps
+import inspect
 from typing import Any, ClassVar, TypeVar
 
 from zhenxun.utils.platform import PlatformUtils
@@ -7,7 +8,7 @@ from zhenxun.utils.platform import PlatformUtils
 from ....base_models import WwBaseResponse
 from ....exceptions import LoginStatusCheckException, WavesException
 from ....models.waves_user import WavesUser
-from ....utils.utils import TimedCache
+from ....utils.cookie_pool import cookie_pool
 from ...const import (
     LOGIN_H5_URL,
     LOGIN_LOG_URL,
@@ -18,46 +19,65 @@ from ...const import (
 )
 from ...error_code import ERROR_CODE, WAVES_CODE_998
 from ...headers import KURO_VERSION, get_headers
+from ...response_cache import DEFAULT_TTL, ResponseCache
+from ...token_store import TokenStore
 from ..call import CallApi, get_server_id, login_platform
 from .models import LoginResult, RequestToken
 
 F = TypeVar("F", bound=Callable[..., Any])
 
 
-time_cache = TimedCache()
-
-
-def login_status_check(role_id_param: str = "role_id"):
+def login_status_check(role_id_param: str = "role_id", ttl: int = DEFAULT_TTL):
     """登录状态检查装饰器
 
-    用于装饰需要检查登录状态的API调用方法
+    用于装饰需要检查登录状态的API调用方法，
+    响应按接口、角色、服务器和其余参数分别缓存
 
     参数:
         role_id_param: 角色ID参数名，默认为 "role_id"
+        ttl: 响应缓存时间（秒），为0时不缓存
 
     使用示例:
-        @login_status_check("role_id")
+        @login_status_check("role_id", ttl=60)
         async def some_api_call(cls, role_id: str, **kwargs):
             # API调用逻辑
             pass
     """
 
     def decorator(func: F) -> F:
+        signature = inspect.signature(func)
+        endpoint = func.__qualname__
+        ResponseCache.register(endpoint, func)
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # 获取角色ID
-            role_id = kwargs.get(role_id_param)
+            # 兼容位置参数传入的角色ID
+            bound = signature.bind(*args, **kwargs)
+            # 补全默认值，省略参数和显式传入默认值时使用同一个缓存键
+            bound.apply_defaults()
+            arguments = bound.arguments
+            role_id = arguments.get(role_id_param)
 
             if not role_id:
                 return await func(*args, **kwargs)
 
-            # 生成缓存键
-            cache_key = f"{role_id}"
-
-            # 检查缓存
-            cached_result = time_cache.get(cache_key)
-            if cached_result is not None:
-                return cached_result
+            cache_key = None
+            if ttl > 0:
+                cache_key = ResponseCache.build_key(
+                    role_id,
+                    arguments.get("server_id"),
+                    {
+                        k: v
+                        for k, v in arguments.items()
+                        if k not in ("cls", role_id_param, "server_id")
+                    },
+                )
+                # 检查缓存
+                cached_result = await ResponseCache.get(
+                    endpoint, role_id, cache_key, ttl
+                )
+                if cached_result is not None:
+                    return cached_result
 
             try:
                 # 执行原始函数
@@ -65,10 +85,14 @@ def login_status_check(role_id_param: str = "role_id"):
 
                 # 如果返回的是响应对象，进行登录状态检查
                 if hasattr(result, "code") and hasattr(result, "msg"):
-                    await LoginApi.login_check(role_id, result)
+                    await LoginApi.login_check(
+                        role_id, result, arguments.get("cookie")
+                    )
 
-                # 更新缓存，使用默认的60秒过期时间
-                time_cache.set(cache_key, result)
+                if cache_key is not None:
+                    await ResponseCache.set(
+                        endpoint, role_id, cache_key, result, ttl
+                    )
 
                 return result
 
@@ -144,12 +168,15 @@ class LoginApi:
         return response
 
     @classmethod
-    async def login_check(cls, role_id: str, response: WwBaseResponse):
+    async def login_check(
+        cls, role_id: str, response: WwBaseResponse, cookie: str | None = None
+    ):
         """登录状态检查
 
         参数:
             role_id: 角色id
             response: 响应数据
+            cookie: 本次请求使用的cookie，可能是从公共cookie池借用的
 
         异常:
             LoginStatusCheckException: 登录状态检查异常
@@ -164,7 +191,14 @@ class LoginApi:
                 login_status="未绑定",
             )
         if "重新登录" in message or "登录已过期" in message:
-            await WavesUser.expire_cookie(role_id=role_id)
+            # 按实际失效的cookie处理，借用的cookie失效时不影响查询的角色
+            if cookie:
+                await WavesUser.expire_cookie(cookie=cookie)
+                cookie_pool.quarantine_cookie(cookie)
+            else:
+                await WavesUser.expire_cookie(role_id=role_id)
+                cookie_pool.quarantine(role_id)
+            await TokenStore.invalidate(role_id)
             raise LoginStatusCheckException(
                 f"鸣潮账号id: 【{role_id}】登录已过期!!!",
                 login_status="已过期",
@@ -185,8 +219,9 @@ class LoginApi:
             login_status="未知异常",
         )
 
+    # 用于检查cookie是否有效，不能使用缓存的结果
     @classmethod
-    @login_status_check()
+    @login_status_check(ttl=0)
     async def login_log(cls, role_id: str, cookie: str) -> WwBaseResponse[bool]:
         """登录状态检查
 
@@ -211,7 +246,7 @@ class LoginApi:
         return response
 
     @classmethod
-    @login_status_check()
+    @login_status_check(ttl=0)
     async def refresh(
         cls, role_id: str, cookie: str, server_id: str | None = None
     ) -> WwBaseResponse[bool]:
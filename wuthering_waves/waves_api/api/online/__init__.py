@@ -7,8 +7,9 @@ from .models import RoleItem, WeaponItem
 
 
 class OnlineApi:
+    # 与角色无关，由 WavesApi 缓存
     @classmethod
-    @login_status_check()
+    @login_status_check(ttl=0)
     async def get_online_list_role(cls, cookie: str) -> WwBaseResponse[list[RoleItem]]:
         """所有的角色列表
 
@@ -23,8 +24,9 @@ class OnlineApi:
         response.data = [RoleItem(**v) for v in response.data]
         return response
 
+    # 与角色无关，由 WavesApi 缓存
     @classmethod
-    @login_status_check()
+    @login_status_check(ttl=0)
     async def get_online_list_weapon(
         cls, cookie: str
     ) -> WwBaseResponse[list[WeaponItem]]:
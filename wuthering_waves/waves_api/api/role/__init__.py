@@ -17,8 +17,9 @@ from .models import CharDetailData, RoleDataContent, RoleInfo, RoleProgress
 import ujson as json
 
 class RoleApi:
+    # 登录和绑定时调用，不缓存
     @classmethod
-    @login_status_check()
+    @login_status_check(ttl=0)
     async def role_list(
         cls, cookie: str, device_id: str
     ) -> tuple[WwBaseResponse[list[RoleInfo]], str]:
@@ -47,7 +48,7 @@ class RoleApi:
         return response, platform
 
     @classmethod
-    @login_status_check()
+    @login_status_check(ttl=60)
     async def char_list(
         cls, role_id: str, cookie: str, server_id: str | None = None
     ) -> WwBaseResponse[RoleDataContent]:
@@ -76,8 +77,9 @@ class RoleApi:
         response.data = RoleDataContent(**response.data)
         return response
 
+    # 刷新面板前会清除角色缓存
     @classmethod
-    @login_status_check()
+    @login_status_check(ttl=300)
     async def get_char_detail_info(
         cls, char_id: str, role_id: str, cookie: str, server_id: str | None = None
     ) -> WwBaseResponse[CharDetailData]:
@@ -115,7 +117,7 @@ class RoleApi:
         return response
 
     @classmethod
-    @login_status_check()
+    @login_status_check(ttl=600)
     async def get_owned_role(
         cls, role_id: str, cookie: str, server_id: str | None = None
     ) -> WwBaseResponse[list[int]]:
@@ -138,7 +140,7 @@ class RoleApi:
         return response
 
     @classmethod
-    @login_status_check()
+    @login_status_check(ttl=300)
     async def get_develop_role_cultivate_status(
         cls,
         role_id: str,
@@ -169,7 +171,7 @@ class RoleApi:
         return response
 
     @classmethod
-    @login_status_check()
+    @login_status_check(ttl=300)
     async def get_batch_role_cost(
         cls,
         role_id: str,
@@ -8,7 +8,7 @@ from .models import BaseUserData, RoleListData, TowerData
 
 class UserApi:
     @classmethod
-    @login_status_check()
+    @login_status_check(ttl=120)
     async def get_base_info(
         cls, role_id: str, cookie: str, server_id: str | None = None
     ) -> WwBaseResponse[BaseUserData]:
@@ -37,8 +37,9 @@ class UserApi:
         response.data = BaseUserData(**response.data)
         return response
 
+    # 刷新面板前会清除角色缓存
     @classmethod
-    @login_status_check()
+    @login_status_check(ttl=300)
     async def get_role_info(
         cls, role_id: str, cookie: str, server_id: str | None = None
     ) -> WwBaseResponse[RoleListData]:
@@ -68,7 +69,7 @@ class UserApi:
         return response
 
     @classmethod
-    @login_status_check()
+    @login_status_check(ttl=300)
     async def get_abyss_data(
         cls, role_id: str, cookie: str, server_id: str | None = None
     ) -> WwBaseResponse[TowerData]:
@@ -92,7 +93,7 @@ class UserApi:
         return response
 
     @classmethod
-    @login_status_check()
+    @login_status_check(ttl=300)
     async def get_abyss_index(
         cls, role_id: str, cookie: str, server_id: str | None = None
     ) -> WwBaseResponse[TowerData]:
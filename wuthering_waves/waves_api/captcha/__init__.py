@@ -1,14 +1,16 @@
 import importlib
+from pathlib import Path
 import pkgutil
 
 from zhenxun.services.log import logger
 
 from ...config import LOG_COMMAND, config
-from ...paths import CAPTCHA_PATH
 from .base import CaptchaSolver
 
 SOLVER_REGISTRY: dict[str, type[CaptchaSolver]] = {}
 
+_discovered = False
+
 
 def register_solver(name: str):
     def decorator(cls: type[CaptchaSolver]):
@@ -19,10 +21,11 @@ def register_solver(name: str):
 
 
 def _auto_discover_solvers():
-    global SOLVER_REGISTRY
-    if SOLVER_REGISTRY:
+    global _discovered
+    if _discovered:
         return
-    package_path = CAPTCHA_PATH
+    _discovered = True
+    package_path = Path(__file__).parent
     package_name = __package__
 
     for module_info in pkgutil.iter_modules([str(package_path)]):
@@ -37,14 +40,12 @@ def _auto_discover_solvers():
                 )
 
 
-# 在包导入时运行发现机制
-_auto_discover_solvers()
-
-
 def get_solver() -> CaptchaSolver | None:
     if not config.login.captcha_provider:
         return None
 
+    # 首次获取时才导入求解器模块
+    _auto_discover_solvers()
     solver_class = SOLVER_REGISTRY.get(config.login.captcha_provider)
 
     logger.info(f"获取验证码求解器: {SOLVER_REGISTRY}", LOG_COMMAND)
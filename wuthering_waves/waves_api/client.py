@@ -0,0 +1,155 @@
+import asyncio
+from contextlib import asynccontextmanager
+import inspect
+from typing import Any, ClassVar
+
+import httpx
+import nonebot
+
+from zhenxun.configs.config import BotConfig
+from zhenxun.services.log import logger
+from zhenxun.utils.user_agent import get_user_agent
+
+from ..config import LOG_COMMAND, config
+
+driver = nonebot.get_driver()
+
+
+class WavesHttpClient:
+    """库街区请求连接池
+
+    整个 waves_api 共享同一个长连接客户端，复用 TCP/TLS 连接，
+    并按域名限制并发连接数，避免每次请求都重新握手，
+    代理和默认请求头与 AsyncHttpx 保持一致
+    """
+
+    _client: ClassVar[httpx.AsyncClient | None] = None
+    _host_semaphores: ClassVar[dict[str, asyncio.Semaphore]] = {}
+
+    @classmethod
+    def __http2_enabled(cls) -> bool:
+        """是否可以启用HTTP/2"""
+        if not config.http.http2:
+            return False
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("未安装 h2 依赖，HTTP/2 已回退为 HTTP/1.1", LOG_COMMAND)
+            return False
+        return True
+
+    @classmethod
+    def __proxy_kwargs(cls) -> dict[str, Any]:
+        """与 AsyncHttpx 一致使用机器人配置的代理
+
+        返回:
+            dict[str, Any]: 创建客户端的代理参数
+        """
+        proxy = BotConfig.system_proxy if config.http.use_proxy else None
+        if not proxy:
+            return {}
+        # httpx 0.26 起使用 proxy 参数，之前的版本只有 proxies
+        if "proxy" in inspect.signature(httpx.AsyncClient.__init__).parameters:
+            return {"proxy": proxy}
+        return {"proxies": proxy}
+
+    @classmethod
+    def get_client(cls) -> httpx.AsyncClient:
+        """获取共享客户端，不存在时创建
+
+        返回:
+            httpx.AsyncClient: 共享客户端
+        """
+        if cls._client is None or cls._client.is_closed:
+            http_config = config.http
+            http2 = cls.__http2_enabled()
+            cls._client = httpx.AsyncClient(
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=http_config.max_connections,
+                    max_keepalive_connections=http_config.max_keepalive_connections,
+                    keepalive_expiry=http_config.keepalive_expiry,
+                ),
+                timeout=http_config.timeout,
+                headers=get_user_agent(),
+                **cls.__proxy_kwargs(),
+            )
+            logger.debug(
+                f"初始化请求连接池: max_connections={http_config.max_connections}"
+                f" http2={http2}",
+                LOG_COMMAND,
+            )
+        return cls._client
+
+    @classmethod
+    def _get_host_semaphore(cls, url: str) -> asyncio.Semaphore:
+        """获取域名对应的并发信号量
+
+        参数:
+            url: 请求地址
+
+        返回:
+            asyncio.Semaphore: 域名信号量
+        """
+        host = httpx.URL(url).host
+        if host not in cls._host_semaphores:
+            cls._host_semaphores[host] = asyncio.Semaphore(
+                config.http.max_connections_per_host
+            )
+        return cls._host_semaphores[host]
+
+    @classmethod
+    async def post(cls, url: str, **kwargs) -> httpx.Response:
+        """发送POST请求
+
+        参数:
+            url: 请求地址
+            **kwargs: httpx 请求参数
+
+        返回:
+            httpx.Response: 响应
+        """
+        async with cls._get_host_semaphore(url):
+            return await cls.get_client().post(url, **kwargs)
+
+    @classmethod
+    async def get(cls, url: str, **kwargs) -> httpx.Response:
+        """发送GET请求
+
+        参数:
+            url: 请求地址
+            **kwargs: httpx 请求参数
+
+        返回:
+            httpx.Response: 响应
+        """
+        async with cls._get_host_semaphore(url):
+            return await cls.get_client().get(url, **kwargs)
+
+    @classmethod
+    @asynccontextmanager
+    async def stream(cls, method: str, url: str, **kwargs):
+        """流式请求，响应体按需读取
+
+        参数:
+            method: 请求方法
+            url: 请求地址
+            **kwargs: httpx 请求参数
+        """
+        async with cls._get_host_semaphore(url):
+            async with cls.get_client().stream(method, url, **kwargs) as response:
+                yield response
+
+    @classmethod
+    async def close(cls):
+        """关闭共享客户端"""
+        if cls._client is not None and not cls._client.is_closed:
+            await cls._client.aclose()
+            logger.debug("请求连接池已关闭", LOG_COMMAND)
+        cls._client = None
+        cls._host_semaphores.clear()
+
+
+@driver.on_shutdown
+async def _():
+    await WavesHttpClient.close()
@@ -1,11 +1,12 @@
-import inspect
 import random
 import string
+import sys
 
 from zhenxun.services.log import logger
 
 from ..config import LOG_COMMAND
 from ..models.waves_user import WavesUser
+from ..utils.credential_cache import Credential, CredentialCache
 from ..utils.utils import get_public_ip
 
 KURO_VERSION = "2.5.0"
@@ -79,6 +80,33 @@ async def get_headers_ios() -> dict:
     }
 
 
+async def get_credential(cookie: str, role_id: str | None) -> Credential | None:
+    """获取cookie对应的用户凭据，优先使用缓存
+
+    参数:
+        cookie: 库洛cookie
+        role_id: 鸣潮uid
+
+    返回:
+        Credential | None: 用户凭据，未找到用户时为None
+    """
+    cached = CredentialCache.get(cookie, role_id)
+    if cached is not None:
+        return cached or None
+    user = None
+    if role_id:
+        user = await WavesUser.get_or_none(role_id=role_id, cookie=cookie)
+    if not user:
+        user = await WavesUser.get_or_none(cookie=cookie)
+    credential = (
+        Credential(user.platform, user.access_token, user.device_id, user.role_id)
+        if user
+        else None
+    )
+    CredentialCache.set(cookie, role_id, credential)
+    return credential
+
+
 async def get_headers(
     cookie: str | None = None,
     platform: str | None = None,
@@ -100,21 +128,16 @@ async def get_headers(
     bat = ""
     did = ""
     platform = "ios"
-    user = None
     if cookie:
-        if role_id:
-            user = await WavesUser.get_or_none(role_id=role_id, cookie=cookie)
-        if not user:
-            user = await WavesUser.get_or_none(cookie=cookie)
-
-        if user:
-            platform = user.platform
-            bat = user.access_token
-            did = user.device_id
-            role_id = user.role_id
+        credential = await get_credential(cookie, role_id)
+        if credential:
+            platform = credential.platform
+            bat = credential.access_token
+            did = credential.device_id
+            role_id = credential.role_id
 
             logger.debug(
-                f"[get_headers.self.{inspect.stack()[1].function}]"
+                f"[get_headers.self.{sys._getframe(1).f_code.co_name}]"
                 f" [role_id:{role_id}] 获取成功: did: {did} bat: {bat}",
                 LOG_COMMAND,
             )
@@ -0,0 +1,235 @@
+from collections.abc import Callable, Hashable
+import hashlib
+import time
+from typing import Any, ClassVar, get_type_hints
+
+from nonebot.compat import type_validate_python
+
+from zhenxun.services.log import logger
+
+from ..config import LOG_COMMAND
+from ..utils.cache import TimedCache
+from ..utils.cache_backend import create_shared_backend, to_jsonable
+
+DEFAULT_TTL = 60
+"""默认缓存时间（秒）"""
+
+DEFAULT_MAXSIZE = 2000
+"""每个接口最大缓存数量"""
+
+INVALIDATION_TTL = 60 * 60
+"""共享缓存中角色缓存清除标记的保存时间（秒）"""
+
+
+class ResponseCache:
+    """库街区接口响应缓存
+
+    每个接口单独一份缓存，键由接口、角色、服务器和其余参数组成，
+    不同接口之间的响应不会互相覆盖，
+    配置了Redis时同时写入共享缓存，其他进程按接口返回类型重新构造响应
+    """
+
+    _shared = create_shared_backend("response", ttl=DEFAULT_TTL)
+
+    _caches: ClassVar[dict[str, TimedCache]] = {}
+    _return_types: ClassVar[dict[str, Any]] = {}
+    _role_keys: ClassVar[dict[str, set[tuple[str, Hashable]]]] = {}
+    _prune_at: ClassVar[int] = DEFAULT_MAXSIZE
+    """角色索引数量达到该值时清理一次"""
+    _stats: ClassVar[dict[str, dict[str, int]]] = {}
+
+    @classmethod
+    def _get_cache(cls, endpoint: str, ttl: int) -> TimedCache:
+        """获取接口对应的缓存
+
+        参数:
+            endpoint: 接口名称
+            ttl: 缓存时间（秒）
+
+        返回:
+            TimedCache: 接口缓存
+        """
+        if endpoint not in cls._caches:
+            cls._caches[endpoint] = TimedCache(
+                timeout=ttl,
+                maxsize=DEFAULT_MAXSIZE,
+                name=f"response:{endpoint}",
+                track_bytes=True,
+                # 响应可以重新请求，超出总预算时最先淘汰
+                priority=0,
+            )
+            cls._stats[endpoint] = {"hits": 0, "misses": 0, "shared_hits": 0}
+        return cls._caches[endpoint]
+
+    @classmethod
+    def register(cls, endpoint: str, func: Callable):
+        """登记接口返回类型，用于从共享缓存重新构造响应
+
+        参数:
+            endpoint: 接口名称
+            func: 接口函数
+        """
+        try:
+            cls._return_types[endpoint] = get_type_hints(func).get("return")
+        except Exception as e:
+            # 无法解析返回类型时该接口只使用进程内缓存
+            logger.debug(f"无法解析接口 {endpoint} 返回类型", LOG_COMMAND, e=e)
+
+    @classmethod
+    def _shared_key(cls, endpoint: str, role_id: str, key: Hashable) -> str:
+        """共享缓存键
+
+        参数:
+            endpoint: 接口名称
+            role_id: 角色ID
+            key: 缓存键
+
+        返回:
+            str: 共享缓存键
+        """
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+        return f"{endpoint}:{role_id}:{digest}"
+
+    @classmethod
+    def build_key(
+        cls, role_id: str, server_id: str | None, arguments: dict[str, Any]
+    ) -> tuple:
+        """生成缓存键
+
+        参数:
+            role_id: 角色ID
+            server_id: 服务器ID
+            arguments: 其余调用参数
+
+        返回:
+            tuple: 缓存键
+        """
+        return (
+            role_id,
+            server_id,
+            tuple(sorted((k, repr(v)) for k, v in arguments.items())),
+        )
+
+    @classmethod
+    async def get(
+        cls, endpoint: str, role_id: str, key: Hashable, ttl: int = DEFAULT_TTL
+    ) -> Any:
+        """获取缓存，进程内未命中时读取共享缓存
+
+        参数:
+            endpoint: 接口名称
+            role_id: 角色ID
+            key: 缓存键
+            ttl: 缓存时间（秒）
+
+        返回:
+            Any: 缓存值，不存在时返回None
+        """
+        cache = cls._get_cache(endpoint, ttl)
+        value = cache.get(key)
+        if value is None and (value := await cls._get_shared(endpoint, role_id, key)):
+            cls._stats[endpoint]["shared_hits"] += 1
+            cache.set(key, value)
+            cls._role_keys.setdefault(role_id, set()).add((endpoint, key))
+        cls._stats[endpoint]["hits" if value is not None else "misses"] += 1
+        return value
+
+    @classmethod
+    async def _get_shared(cls, endpoint: str, role_id: str, key: Hashable) -> Any:
+        """读取共享缓存，写入后角色缓存被清除过时视为未命中
+
+        参数:
+            endpoint: 接口名称
+            role_id: 角色ID
+            key: 缓存键
+
+        返回:
+            Any: 重新构造的响应，不存在时返回None
+        """
+        return_type = cls._return_types.get(endpoint)
+        if not cls._shared or return_type is None:
+            return None
+        item = await cls._shared.get(cls._shared_key(endpoint, role_id, key))
+        if not item:
+            return None
+        stored_at, data = item
+        invalidated_at = await cls._shared.get(f"invalidated:{role_id}")
+        if invalidated_at and invalidated_at >= stored_at:
+            return None
+        try:
+            return type_validate_python(return_type, data)
+        except Exception as e:
+            logger.debug(f"共享缓存响应构造失败: {endpoint}", LOG_COMMAND, e=e)
+            return None
+
+    @classmethod
+    async def set(
+        cls,
+        endpoint: str,
+        role_id: str,
+        key: Hashable,
+        value: Any,
+        ttl: int = DEFAULT_TTL,
+    ):
+        """写入缓存
+
+        参数:
+            endpoint: 接口名称
+            role_id: 角色ID
+            key: 缓存键
+            value: 缓存值
+            ttl: 缓存时间（秒）
+        """
+        cls._get_cache(endpoint, ttl).set(key, value)
+        if cls._shared and cls._return_types.get(endpoint) is not None:
+            await cls._shared.set(
+                cls._shared_key(endpoint, role_id, key),
+                [time.time(), to_jsonable(value)],
+                ttl,
+            )
+        if role_id not in cls._role_keys and len(cls._role_keys) >= cls._prune_at:
+            cls._prune()
+        cls._role_keys.setdefault(role_id, set()).add((endpoint, key))
+
+    @classmethod
+    def _prune(cls):
+        """清理已被淘汰或过期的角色索引，下次清理的阈值随剩余数量翻倍"""
+        for role_id in list(cls._role_keys):
+            keys = {
+                (endpoint, key)
+                for endpoint, key in cls._role_keys[role_id]
+                if key in cls._caches[endpoint]
+            }
+            if keys:
+                cls._role_keys[role_id] = keys
+            else:
+                del cls._role_keys[role_id]
+        # 清理后仍有大量有效角色时推迟下次清理，避免每个新角色都完整扫描一次
+        cls._prune_at = max(DEFAULT_MAXSIZE, len(cls._role_keys) * 2)
+
+    @classmethod
+    async def invalidate_role(cls, role_id: str):
+        """清除角色所有接口的缓存，共享缓存中记录清除时间，使其他进程的缓存失效
+
+        参数:
+            role_id: 角色ID
+        """
+        for endpoint, key in cls._role_keys.pop(role_id, set()):
+            if cache := cls._caches.get(endpoint):
+                cache.delete(key)
+        if cls._shared:
+            await cls._shared.set(
+                f"invalidated:{role_id}", time.time(), INVALIDATION_TTL
+            )
+
+    @classmethod
+    def stats(cls) -> dict[str, dict[str, int]]:
+        """各接口的缓存统计
+
+        返回:
+            dict[str, dict[str, int]]: 命中、未命中次数和当前缓存数量
+        """
+        return {
+            endpoint: {**stat, "size": len(cls._caches[endpoint])}
+            for endpoint, stat in cls._stats.items()
+        }
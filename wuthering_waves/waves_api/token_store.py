@@ -0,0 +1,180 @@
+from collections import OrderedDict
+import hashlib
+import time
+from typing import ClassVar
+
+from ..config import config
+from ..models.waves_user import WavesUser
+from ..utils.cache_backend import create_shared_backend
+from ..utils.credential_cache import CredentialCache
+
+TokenKey = tuple[str, str]
+"""(角色ID, cookie)"""
+
+
+class TokenStore:
+    """access_token 两级存储
+
+    内存中按 (角色ID, cookie) 保存最近使用的 access_token，
+    内存未命中时依次读取共享缓存（配置了Redis时）和 `WavesUser.access_token`，
+    新获取的 access_token 同时写回共享缓存和数据库，重启后无需重新请求
+    """
+
+    _shared = create_shared_backend("access_token")
+
+    REFRESH_RETRY_INTERVAL = 300
+    """主动刷新后再次尝试刷新的最短间隔（秒）"""
+
+    _tokens: ClassVar[OrderedDict[TokenKey, tuple[str, float]]] = OrderedDict()
+    """(角色ID, cookie) 到 access_token 和获取时间"""
+    _retry_at: ClassVar[dict[TokenKey, float]] = {}
+    """(角色ID, cookie) 到刷新失败后下次允许刷新的时间"""
+    _stats: ClassVar[dict[str, int]] = {
+        "memory_hits": 0,
+        "shared_hits": 0,
+        "db_hits": 0,
+        "misses": 0,
+        "invalidations": 0,
+    }
+
+    @classmethod
+    def _remember(cls, key: TokenKey, token: str, fetched_at: float):
+        """写入内存缓存，超出数量时淘汰最久未使用的项
+
+        参数:
+            key: (角色ID, cookie)
+            token: access_token
+            fetched_at: 获取时间
+        """
+        cls._tokens[key] = (token, fetched_at)
+        cls._tokens.move_to_end(key)
+        while len(cls._tokens) > max(config.token.cache_size, 1):
+            evicted, _ = cls._tokens.popitem(last=False)
+            cls._retry_at.pop(evicted, None)
+
+    @classmethod
+    async def get(cls, role_id: str, cookie: str) -> str | None:
+        """获取 access_token
+
+        参数:
+            role_id: 角色ID
+            cookie: 登录cookie
+
+        返回:
+            str | None: access_token，两级存储都没有时为None
+        """
+        key = (role_id, cookie)
+        if item := cls._tokens.get(key):
+            cls._tokens.move_to_end(key)
+            cls._stats["memory_hits"] += 1
+            return item[0]
+        if cls._shared and (item := await cls._shared.get(cls._shared_key(key))):
+            cls._stats["shared_hits"] += 1
+            cls._remember(key, item[0], item[1])
+            return item[0]
+        tokens = await WavesUser.filter(
+            role_id=role_id, cookie=cookie, access_token__not_isnull=True
+        ).limit(1).values_list("access_token", flat=True)
+        if token := next(iter(tokens), None):
+            cls._stats["db_hits"] += 1
+            # 数据库中没有获取时间，按加载时间计算刷新间隔
+            cls._remember(key, str(token), time.time())
+            return str(token)
+        cls._stats["misses"] += 1
+        return None
+
+    @classmethod
+    def _shared_key(cls, key: TokenKey) -> str:
+        """共享缓存键，cookie只保存摘要
+
+        参数:
+            key: (角色ID, cookie)
+
+        返回:
+            str: 共享缓存键
+        """
+        return f"{key[0]}:{hashlib.sha1(key[1].encode()).hexdigest()[:16]}"
+
+    @classmethod
+    def needs_refresh(cls, role_id: str, cookie: str) -> bool:
+        """access_token 是否已到主动刷新时间
+
+        参数:
+            role_id: 角色ID
+            cookie: 登录cookie
+
+        返回:
+            bool: 是否需要刷新
+        """
+        key = (role_id, cookie)
+        item = cls._tokens.get(key)
+        now = time.time()
+        return (
+            bool(item)
+            and now - item[1] > config.token.refresh_after
+            and now >= cls._retry_at.get(key, 0)
+        )
+
+    @classmethod
+    def mark_refresh_attempt(cls, role_id: str, cookie: str):
+        """记录一次主动刷新，刷新失败时间隔一段时间后才再次尝试
+
+        参数:
+            role_id: 角色ID
+            cookie: 登录cookie
+        """
+        cls._retry_at[(role_id, cookie)] = time.time() + cls.REFRESH_RETRY_INTERVAL
+
+    @classmethod
+    async def set(cls, role_id: str, cookie: str, token: str):
+        """保存新获取的 access_token
+
+        参数:
+            role_id: 角色ID
+            cookie: 登录cookie
+            token: access_token
+        """
+        key = (role_id, cookie)
+        fetched_at = time.time()
+        cls._retry_at.pop(key, None)
+        cls._remember(key, token, fetched_at)
+        if cls._shared:
+            await cls._shared.set(cls._shared_key(key), [token, fetched_at])
+        if await WavesUser.filter(role_id=role_id, cookie=cookie).update(
+            access_token=token
+        ):
+            CredentialCache.invalidate(role_id=role_id)
+
+    @classmethod
+    async def invalidate(cls, role_id: str, cookie: str | None = None):
+        """清除两级存储中的 access_token，下次使用时重新获取
+
+        参数:
+            role_id: 角色ID
+            cookie: 登录cookie，为空时清除该角色所有cookie对应的access_token
+        """
+        for key in [
+            k for k in cls._tokens if k[0] == role_id and cookie in (None, k[1])
+        ]:
+            cls._tokens.pop(key, None)
+            cls._retry_at.pop(key, None)
+            if cls._shared:
+                await cls._shared.delete(cls._shared_key(key))
+        if cls._shared and cookie:
+            # 其他进程写入的共享缓存本地不一定有记录
+            await cls._shared.delete(cls._shared_key((role_id, cookie)))
+        cls._stats["invalidations"] += 1
+        query = WavesUser.filter(role_id=role_id)
+        if cookie:
+            query = query.filter(cookie=cookie)
+        await query.update(access_token=None)
+        CredentialCache.invalidate(role_id=role_id)
+
+    @classmethod
+    def stats(cls) -> dict[str, int]:
+        """统计信息
+
+        返回:
+            dict[str, int]: 命中、未命中、清除次数和当前数量
+        """
+        return {**cls._stats, "size": len(cls._tokens)}